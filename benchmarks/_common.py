@@ -0,0 +1,25 @@
+"""
+Bootstrap shared by the benchmark scripts, which run straight from the checkout:
+
+    python benchmarks/<script>.py
+"""
+import json
+import os
+import sys
+import tempfile
+
+WORKDIR = tempfile.mkdtemp()
+BASE_CONFIG = {"NAME": "bench", "APM": {"ENABLED": False}}
+
+
+def load_torpedo(**config):
+    """
+    Make the checkout's torpedo importable. torpedo reads ./config.json on import, so BASE_CONFIG
+    updated with ``config`` is written to a scratch working directory first.
+    """
+    with open(os.path.join(WORKDIR, "config.json"), "w") as config_file:
+        json.dump({**BASE_CONFIG, **config}, config_file)
+    os.chdir(WORKDIR)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
@@ -0,0 +1,93 @@
+"""
+Loopback benchmark comparing BaseHttpRequest over TCP and over a UNIX domain socket.
+
+    python benchmarks/unix_socket_transport.py --requests 20000 --concurrency 50
+
+An aiohttp server in a separate process answers on 127.0.0.1 and on a UNIX socket at the same
+time, and the same client code is timed against both transports.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import time
+
+from aiohttp import web
+
+from _common import WORKDIR, load_torpedo
+
+SOCKET_PATH = os.path.join(WORKDIR, "bench.sock")
+PAYLOAD = {"data": {"sku": "abc", "price": 10.5, "tags": ["x"] * 20}, "is_success": True, "status_code": 200}
+
+
+def serve(port):
+    async def handler(request):
+        return web.json_response(PAYLOAD)
+
+    app = web.Application()
+    app.router.add_get("/bench", handler)
+    runner = web.AppRunner(app, access_log=None)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+    loop.run_until_complete(web.UnixSite(runner, SOCKET_PATH).start())
+    loop.run_forever()
+
+
+def start_server(port):
+    server = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    while not os.path.exists(SOCKET_PATH):
+        time.sleep(0.05)
+    return server
+
+
+async def run(client, requests, concurrency):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await client.get("/bench", headers={})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "req_per_sec": round(requests / elapsed),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+async def main(args):
+    load_torpedo()
+    from torpedo import BaseHttpRequest
+    from torpedo.session_manager import SessionManager
+
+    class TcpClient(BaseHttpRequest):
+        _host = "http://127.0.0.1:{}".format(args.port)
+
+    class UnixClient(BaseHttpRequest):
+        _host = "unix://" + SOCKET_PATH
+
+    server = start_server(args.port)
+    try:
+        for name, client in (("tcp", TcpClient), ("unix", UnixClient)):
+            await run(client, min(1000, args.requests), args.concurrency)  # warm up the pool
+            print(name, await run(client, args.requests, args.concurrency))
+    finally:
+        await SessionManager.close()
+        server.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=18080)
+    asyncio.run(main(parser.parse_args()))
@@ -13,15 +13,30 @@ __all__ = [
     "TaskExecutor",
     "AsyncTaskResponse",
     "get_error_body_response",
-    "APIRequestDecorator"
+    "APIRequestDecorator",
+    "ResponseCache",
+    "CircuitBreaker",
+    "RetryPolicy",
+    "RetryBudget",
+    "HedgePolicy",
+    "AdaptiveConcurrencyLimiter",
+    "LoadBalancer",
+    "skip_middleware_stages"
 ]
 
 from .base_api_request import BaseApiRequest
 from .base_http_request import BaseHttpRequest
+from .circuit_breaker import CircuitBreaker
+from .concurrency_limiter import AdaptiveConcurrencyLimiter
 from .common_utils import CONFIG
 from .exceptions import HTTPInterServiceRequestException
 from .handlers import send_response, get_error_body_response
+from .hedging import HedgePolicy
 from .host import Host
+from .load_balancer import LoadBalancer
+from .middlewares import skip_middleware_stages
+from .response_cache import ResponseCache
+from .retry_policy import RetryBudget, RetryPolicy
 from .shared_context import SharedContext
 from .task import AsyncTaskResponse, Task, TaskExecutor
 from .wrappers import Request
@@ -1,7 +1,8 @@
-import aiotask_context as context
-
+from . import request_context as context
 from .base_http_request import BaseHttpRequest
-from .constants import GLOBAL_HEADERS, X_SERVICE_NAME, X_SERVICE_VERSION, CONTENT_TYPE
+from .constants import X_REQUEST_DEADLINE
+from .deadline import get_remaining_budget
+from .exceptions import DeadlineExceededException
 from .parser import BaseApiResponseParser
 
 
@@ -12,11 +13,15 @@ class BaseApiRequest(BaseHttpRequest):
     def get_global_headers(
             cls,
     ):
-        global_headers = context.get(GLOBAL_HEADERS) or dict()
-        global_headers[X_SERVICE_NAME] = cls._config.get("NAME", "Unknown")
-        global_headers[X_SERVICE_VERSION] = cls._config.get("HTTP_VERSION", "Unknown")
-        global_headers[CONTENT_TYPE] = "application/json"
-        return global_headers
+        """
+        :return: read only headers sent with every upstream call, built once per request
+        """
+        service_name = cls._config.get("NAME", "Unknown")
+        service_version = cls._config.get("HTTP_VERSION", "Unknown")
+        request_context = context.current()
+        if request_context is None:
+            return context.build_outbound_headers(None, service_name, service_version)
+        return request_context.outbound_headers(service_name, service_version)
 
     @classmethod
     def get_request_headers(cls, headers):
@@ -28,4 +33,19 @@ class BaseApiRequest(BaseHttpRequest):
 
             return headers
 
-        return global_headers
+        # a copy, the caller may still add headers (multipart, conditional requests)
+        return dict(global_headers)
+
+    @classmethod
+    def apply_deadline(cls, timeout, headers):
+        """
+        Clamp the timeout to what is left of the incoming request's deadline and forward the
+        remaining budget upstream. Calls made after the deadline fail fast without going out.
+        """
+        remaining = get_remaining_budget()
+        if remaining is None:
+            return timeout, headers
+        if remaining <= 0:
+            raise DeadlineExceededException({"message": "Request deadline exceeded"})
+        headers = {**headers, X_REQUEST_DEADLINE: str(int(remaining * 1000))}
+        return min(timeout, remaining), headers
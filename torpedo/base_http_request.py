@@ -1,34 +1,94 @@
 import asyncio
 import time
-import ujson as json
-from aiohttp import ClientSession, ContentTypeError, TCPConnector
+from contextlib import asynccontextmanager
+
+from aiohttp import ClientError, ClientTimeout
 from multidict import MultiDict as WraperMultiDict
 from sanic.log import access_logger as logger
 from yarl import URL
 
+from .bulk import bounded_map, get_host_semaphore
+from . import json_codec as json
 from .common_utils import CONFIG
-from .constants import HTTPMethod, CONTENT_TYPE
-from .exceptions import HTTPRequestException, HTTPRequestTimeoutException
+from .constants import HTTPMethod, HTTPStatusCodes, CONTENT_TYPE
+from .exceptions import BaseSanicException, CircuitBreakerOpenException, HTTPRequestException, \
+    HTTPRequestTimeoutException
 from .parser import BaseHttpResponseParser
 from .handlers import send_response
+from .hedging import HedgePolicy
+from .load_balancer import LoadBalancer
+from .retry_policy import RetryPolicy
+from .session_manager import SessionManager
+from .single_flight import SingleFlight
+from .streaming import DEFAULT_CHUNK_SIZE, PROXY_HEADERS, StreamedResponse
 
-SESSION = None
+SINGLE_FLIGHT = SingleFlight()
+UNIX_SOCKET_SCHEME = "unix://"
+# requests over a UNIX socket still need an http URL, the host part is not used for routing
+UNIX_SOCKET_BASE_URL = "http://localhost"
+# upstream answers telling the adaptive limiter to back off
+OVERLOAD_STATUS_CODES = {429, 502, 503, 504}
 
 
 class BaseHttpRequest:
+    # base URL of the upstream, or unix:///path/to/service.sock for a co-located service
     _host = ""
+    # upstream origins to balance calls over, _host then only provides the base path
+    _hosts = []
+    # LoadBalancer used for _hosts, a default one is created on first use
+    _load_balancer = None
     _timeout = 60
     _parser = BaseHttpResponseParser
     _config = CONFIG.config
+    # name of a dedicated connection pool for this client, configured under HTTP_CLIENT.POOLS
+    _session_pool = None
+    # opt-in ResponseCache instance, e.g. _cache = ResponseCache(max_entries=512, ttl=30)
+    _cache = None
+    # coalesce identical in-flight GETs of this client into a single upstream call
+    _coalesce_requests = False
+    # opt-in per host CircuitBreaker instance
+    _circuit_breaker = None
+    # opt-in RetryPolicy, can be overridden per call with retry_policy
+    _retry_policy = None
+    # opt-in HedgePolicy for GETs, can be overridden per call with hedge_policy
+    _hedge_policy = None
+    # opt-in AdaptiveConcurrencyLimiter, adapts the calls in flight per upstream host
+    _concurrency_limiter = None
+    # worker wide cap on bulk (map) calls in flight to this client's host, falls back to
+    # HTTP_CLIENT.BULK_LIMIT_PER_HOST
+    _bulk_limit_per_host = None
+    # keep the upstream's data as raw JSON, decoded on the first AsyncTaskResponse.data access, so
+    # pass-through handlers can hand it to send_response without a decode / encode round trip
+    _lazy_decode = False
+
+    @classmethod
+    async def get_session(cls, host=None):
+        return SessionManager.get_session(
+            SessionManager.resolve_pool(cls._session_pool, host, cls.get_unix_socket())
+        )
+
+    @classmethod
+    def get_unix_socket(cls):
+        if cls._host.startswith(UNIX_SOCKET_SCHEME):
+            return cls._host[len(UNIX_SOCKET_SCHEME):]
+        return None
+
+    @classmethod
+    def get_base_url(cls):
+        if cls.get_unix_socket():
+            return UNIX_SOCKET_BASE_URL
+        return cls._host or (cls._hosts[0] if cls._hosts else "")
 
     @classmethod
-    async def get_session(cls):
-        global SESSION
-        if SESSION is None:
-            conn = TCPConnector(limit=(cls._config.get("CONCURRENCY_LIMIT") or 0),
-                                limit_per_host=(cls._config.get("CONCURRENCY_LIMIT_HOST") or 0))
-            SESSION = ClientSession(connector=conn)
-        return SESSION
+    def get_upstream_key(cls):
+        """
+        Identifies the upstream the client calls: its socket path, the origins of its _hosts or
+        the origin of _host
+        """
+        if cls.get_unix_socket():
+            return cls._host
+        hosts = cls._hosts or [cls._host]
+        return ",".join(str(URL(host).origin()) if URL(host).is_absolute() else host for host in hosts)
 
     @classmethod
     def get_request_headers(cls, headers):
@@ -47,9 +107,68 @@ class BaseHttpRequest:
             headers=None,
             multipart=False,
             response_headers_list=None,
-            purge_response_keys=False
+            purge_response_keys=False,
+            use_cache=True,
+            coalesce=None,
+            retry_policy: RetryPolicy = None,
+            hedge_policy: HedgePolicy = None,
+            lazy_decode=None
     ):
-        url = cls._host + path
+        url, data, headers, request_params = cls._prepare_request(path, data, query_params, headers, multipart)
+        if lazy_decode is None:
+            lazy_decode = cls._lazy_decode
+
+        cache, cache_key, cached = None, None, None
+        if (
+            use_cache and cls._cache is not None and method.lower() == HTTPMethod.GET.value
+            and not cls._cache.is_private_request(headers)
+        ):
+            cache = cls._cache
+            cache_key = cache.build_key(method, str(url))
+            cached = cache.get(cache_key)
+
+        try:
+            if cached is not None and cached.is_fresh():
+                cache.record_hit()
+                request_params["cache"] = "hit"
+                logger.debug(json.dumps(request_params))
+                resp_status_code, resp_headers, body = cached.status_code, cached.headers, cached.body
+            else:
+                if cached is not None and cached.can_revalidate():
+                    # never mutate the caller's (or the shared global) header dict
+                    headers = {**headers, **cached.conditional_headers()}
+                resp_status_code, resp_headers, body = await cls._send(
+                    method, url, data, headers, timeout, request_params, coalesce, retry_policy, hedge_policy
+                )
+                if cache is not None:
+                    if resp_status_code == HTTPStatusCodes.NOT_MODIFIED.value and cached is not None:
+                        cache.record_revalidation()
+                        request_params["cache"] = "revalidated"
+                        cached = cache.refresh(cache_key, cached, resp_headers)
+                        resp_status_code, resp_headers, body = cached.status_code, cached.headers, cached.body
+                    else:
+                        cache.record_miss()
+                        request_params["cache"] = "miss"
+                        cache.store(cache_key, resp_status_code, resp_headers, body)
+            # purging keys needs the decoded payload anyway
+            payload = cls.decode_payload(body, lazy=lazy_decode and not purge_response_keys)
+        except BaseSanicException:
+            raise
+        except Exception as exception:
+            exception_message = str(exception)
+            request_params["exception"] = exception_message
+            raise HTTPRequestException({"message": exception_message})
+
+        if purge_response_keys:
+            payload = send_response(data=payload, purge_response_keys=purge_response_keys)
+        response_data = cls.parse_response(
+            payload, resp_status_code, resp_headers, response_headers_list
+        )
+        return response_data
+
+    @classmethod
+    def _prepare_request(cls, path, data, query_params, headers, multipart):
+        url = cls.get_base_url() + path
         url = URL(url)
         url = cls.build_query_params(url, query_params)
         headers = cls.get_request_headers(headers)
@@ -68,43 +187,405 @@ class BaseHttpRequest:
             headers["Content-Type"] = "multipart/form-data"
         else:
             if data:
-                data = json.dumps(data)
+                data = json.dumps_bytes(data)
+        return url, data, headers, request_params
+
+    @classmethod
+    @asynccontextmanager
+    async def stream(
+            cls,
+            method: str,
+            path: str,
+            data: dict = None,
+            query_params: dict = None,
+            timeout=None,
+            headers=None,
+            multipart=False,
+    ):
+        """
+        Open an upstream request without buffering its body
+
+            async with Client.stream("get", "/v1/export") as response:
+                async for record in response.iter_records():
+                    ...
+
+        The timeout applies to connecting and to every read of the body rather than to the
+        whole transfer, so a large but steadily flowing download is never cut short.
+        :return: StreamedResponse exposing status, headers and chunk / line / NDJSON iterators
+        """
+        url, data, headers, request_params = cls._prepare_request(path, data, query_params, headers, multipart)
+        request_timeout, headers = cls.apply_deadline(cls.request_timeout(timeout), headers)
+        balancer, endpoint = None, None
+        if cls._hosts:
+            balancer = cls.get_load_balancer()
+            endpoint = balancer.choose(cls._hosts)
+            url = endpoint.rewrite(url)
+            request_params["endpoint"] = endpoint.base_url
+        circuit = cls._circuit_breaker.for_host(str(url.origin())) if cls._circuit_breaker else None
+        start_time = time.time()
+        probe = None
+        try:
+            if circuit is not None:
+                probe = circuit.before_request()
+            session = await cls.get_session(url.host)
+            response = await session.request(
+                method, str(url), data=data, headers=headers,
+                timeout=ClientTimeout(total=None, sock_connect=request_timeout, sock_read=request_timeout),
+            )
+        except asyncio.CancelledError:
+            if circuit is not None:
+                circuit.release(probe)
+            if balancer is not None:
+                balancer.release(endpoint)
+            raise
+        except CircuitBreakerOpenException:
+            if balancer is not None:
+                balancer.release(endpoint)
+            raise
+        except asyncio.TimeoutError:
+            if circuit is not None:
+                circuit.record_timeout(probe)
+            if balancer is not None:
+                balancer.release(endpoint, time.time() - start_time, failed=True)
+            exception_message = "Inter service request timeout error"
+            request_params["api_timeout_exception"] = exception_message
+            raise HTTPRequestTimeoutException({"message": exception_message})
+        except Exception as exception:
+            if circuit is not None:
+                circuit.record_failure(probe)
+            if balancer is not None:
+                balancer.release(endpoint, time.time() - start_time, failed=True)
+            exception_message = str(exception)
+            request_params["exception"] = exception_message
+            raise HTTPRequestException({"message": exception_message})
+
+        if circuit is not None:
+            circuit.record_result(response.status, probe)
+        request_params["process_time"] = time.time() - start_time
+        streamed_response = StreamedResponse(response)
+        try:
+            yield streamed_response
+        finally:
+            response.release()
+            if balancer is not None:
+                balancer.release(endpoint, request_params["process_time"], failed=response.status >= 500)
+            request_params["stream_time"] = time.time() - start_time
+            request_params["bytes_read"] = streamed_response.bytes_read
+            logger.debug(json.dumps(request_params))
+
+    @classmethod
+    async def proxy(
+            cls,
+            request,
+            method: str,
+            path: str,
+            data: dict = None,
+            query_params: dict = None,
+            timeout=None,
+            headers=None,
+            multipart=False,
+            forward_headers=PROXY_HEADERS,
+            chunk_size=DEFAULT_CHUNK_SIZE,
+    ):
+        """
+        Pipe an upstream response straight into the response of the Sanic ``request`` being
+        handled, e.g. for file and report downloads. The response is sent by the time this returns,
+        the handler returns nothing
+
+            async def download(request, report_id):
+                await ReportClient.proxy(request, "get", "/v1/reports/{}".format(report_id), headers={})
+
+        The upstream status and the ``forward_headers`` found on the upstream response are sent
+        on, memory stays bound by ``chunk_size`` whatever the size of the body. Errors before the
+        upstream answered surface like with ``stream``; once the status line went out to the
+        client, an error can only cut the response short.
+        """
+        async with cls.stream(
+                method, path, data=data, query_params=query_params, timeout=timeout, headers=headers,
+                multipart=multipart,
+        ) as upstream:
+            response = await request.respond(status=upstream.status, headers=upstream.proxy_headers(forward_headers))
+            await upstream.pipe(response, chunk_size)
+            await response.eof()
 
+    @classmethod
+    async def _send(cls, method, url, data, headers, timeout, request_params, coalesce=None, retry_policy=None,
+                    hedge_policy=None):
+        if coalesce is None:
+            coalesce = cls._coalesce_requests and method.lower() == HTTPMethod.GET.value
+        key = SINGLE_FLIGHT.build_key(method, url, data, headers) if coalesce else None
+        if key is None:
+            return await cls._fetch_with_retries(
+                method, url, data, headers, timeout, request_params, retry_policy, hedge_policy
+            )
+
+        # followers share the leader's upstream call, including its headers, timeout and retries
+        async def fetch():
+            return await cls._fetch_with_retries(
+                method, url, data, headers, timeout, request_params, retry_policy, hedge_policy
+            )
+
+        result = await SINGLE_FLIGHT.do(key, fetch)
+        if "process_time" not in request_params:
+            request_params["coalesced"] = True
+        return result
+
+    @classmethod
+    async def _fetch_with_retries(cls, method, url, data, headers, timeout, request_params, retry_policy=None,
+                                  hedge_policy=None):
+        policy = retry_policy or cls._retry_policy
+        if policy is None or not policy.is_retryable_method(method):
+            return await cls._fetch_hedged(method, url, data, headers, timeout, request_params, hedge_policy)
+
+        policy.on_request()
+        attempts = request_params["attempts"] = []
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                start_time = time.time()
+                try:
+                    result = await cls._fetch_hedged(
+                        method, url, data, headers, timeout, request_params, hedge_policy
+                    )
+                except Exception as exception:
+                    attempts.append({
+                        "attempt": attempt,
+                        "exception": str(exception),
+                        "process_time": time.time() - start_time,
+                    })
+                    if not policy.should_retry_exception(exception) or not policy.can_retry(attempt):
+                        raise
+                else:
+                    attempts.append({
+                        "attempt": attempt,
+                        "status_code": result[0],
+                        "process_time": time.time() - start_time,
+                    })
+                    if not policy.should_retry_status(result[0]) or not policy.can_retry(attempt):
+                        return result
+                await asyncio.sleep(policy.backoff(attempt))
+        finally:
+            # one log entry carrying every attempt of the call
+            if len(attempts) > 1:
+                logger.debug(json.dumps(request_params))
+
+    @classmethod
+    async def _fetch_hedged(cls, method, url, data, headers, timeout, request_params, hedge_policy=None):
+        policy = hedge_policy or cls._hedge_policy
+        if policy is None or method.lower() != HTTPMethod.GET.value:
+            return await cls._fetch(method, url, data, headers, timeout, request_params)
+
+        host = cls.get_upstream_key()
+        policy.on_request()
+        start_time = time.monotonic()
+        primary = asyncio.ensure_future(cls._fetch(method, url, data, headers, timeout, request_params))
+        tasks = [primary]
+        try:
+            delay = policy.get_delay(host)
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+            if primary.done() or delay is None or not policy.can_hedge():
+                result = await primary
+                policy.record_latency(host, time.monotonic() - start_time)
+                return result
+
+            request_params["hedged"] = True
+            hedge_params = dict(request_params)
+            hedge = asyncio.ensure_future(cls._fetch(method, url, data, headers, timeout, hedge_params))
+            tasks.append(hedge)
+            pending, result, exception = set(tasks), None, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        exception = task.exception()
+                        continue
+                    result = task.result()
+                    # a 5xx only wins when the other attempt fails as well
+                    if result[0] < 500 or not pending:
+                        if task is primary:
+                            policy.record_latency(host, time.monotonic() - start_time)
+                        else:
+                            policy.hedges_won += 1
+                            request_params["process_time"] = hedge_params.get("process_time")
+                        return result
+            if result is not None:
+                return result
+            raise exception
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    @classmethod
+    def hedge_stats(cls):
+        return cls._hedge_policy.stats() if cls._hedge_policy is not None else None
+
+    @classmethod
+    def retry_stats(cls):
+        return cls._retry_policy.stats() if cls._retry_policy is not None else None
+
+    @classmethod
+    def concurrency_stats(cls):
+        return cls._concurrency_limiter.stats() if cls._concurrency_limiter is not None else None
+
+    @classmethod
+    def circuit_breaker_stats(cls):
+        return cls._circuit_breaker.stats() if cls._circuit_breaker is not None else None
+
+    @classmethod
+    def single_flight_stats(cls):
+        return SINGLE_FLIGHT.stats()
+
+    @classmethod
+    def get_load_balancer(cls):
+        if cls._load_balancer is None:
+            cls._load_balancer = LoadBalancer()
+        return cls._load_balancer
+
+    @classmethod
+    def load_balancer_stats(cls):
+        return cls._load_balancer.stats() if cls._load_balancer is not None else None
+
+    @classmethod
+    async def _fetch(cls, method, url, data, headers, timeout, request_params):
+        """
+        Send a single request upstream, to one of the _hosts endpoints if the client has any
+        :return: (status_code, headers, body bytes)
+        """
+        if not cls._hosts:
+            return await cls._fetch_from(method, url, data, headers, timeout, request_params)
+
+        balancer = cls.get_load_balancer()
+        endpoint = balancer.choose(cls._hosts)
+        request_params["endpoint"] = endpoint.base_url
+        start_time = time.time()
+        latency, failed = None, True
+        try:
+            result = await cls._fetch_from(method, endpoint.rewrite(url), data, headers, timeout, request_params)
+            latency, failed = time.time() - start_time, result[0] >= 500
+            return result
+        except (HTTPRequestTimeoutException, ClientError, OSError):
+            latency = time.time() - start_time
+            raise
+        finally:
+            balancer.release(endpoint, latency, failed)
+
+    @classmethod
+    async def _fetch_from(cls, method, url, data, headers, timeout, request_params):
+        """
+        Send a single request to ``url`` and read the complete body
+        :return: (status_code, headers, body bytes)
+        """
+        request_timeout, headers = cls.apply_deadline(cls.request_timeout(timeout), headers)
+        origin = str(url.origin())
+        circuit = cls._circuit_breaker.for_host(origin) if cls._circuit_breaker else None
+        probe = circuit.before_request() if circuit is not None else None
+        limiter = cls._concurrency_limiter.for_host(origin) if cls._concurrency_limiter else None
+        if limiter is not None:
+            try:
+                await limiter.acquire()
+            except BaseException:
+                if circuit is not None:
+                    circuit.release(probe)
+                raise
+
+        start_time = time.time()
+        rtt, dropped = None, True
         try:
-            start_time = time.time()
-            session = await cls.get_session()
+            session = await cls.get_session(url.host)
             async with session.request(method, str(url), data=data, headers=headers,
-                                       timeout=cls.request_timeout(timeout)) as response:
+                                       timeout=request_timeout) as response:
                 resp_status_code = response.status
                 resp_headers = response.headers
-                try:
-                    payload = await response.json()
-                except ContentTypeError:
-                    payload = await response.text()
-                    payload = json.loads(payload)
+                body = await response.read()
                 end_time = time.time()
 
                 request_time = end_time - start_time
                 request_params["process_time"] = request_time
+                rtt, dropped = request_time, resp_status_code in OVERLOAD_STATUS_CODES
 
                 logger.debug("{} - {}".format(str(url), request_time * 1000))
                 logger.debug(json.dumps(request_params))
+        except asyncio.CancelledError:
+            if circuit is not None:
+                circuit.release(probe)
+            raise
         except asyncio.TimeoutError as exception:
             print(exception)
+            rtt = time.time() - start_time
+            if circuit is not None:
+                circuit.record_timeout(probe)
             exception_message = "Inter service request timeout error"
             request_params["api_timeout_exception"] = exception_message
             raise HTTPRequestTimeoutException({"message": exception_message})
-        except Exception as exception:
-            exception_message = str(exception)
-            request_params["exception"] = exception_message
-            raise HTTPRequestException({"message": exception_message})
+        except Exception:
+            rtt = time.time() - start_time
+            if circuit is not None:
+                circuit.record_failure(probe)
+            raise
+        finally:
+            if limiter is not None:
+                limiter.release(rtt, dropped)
+        if circuit is not None:
+            circuit.record_result(resp_status_code, probe)
+        return resp_status_code, resp_headers, body
 
-        if purge_response_keys:
-            payload = send_response(data=payload, purge_response_keys=purge_response_keys)
-        response_data = cls.parse_response(
-            payload, resp_status_code, resp_headers, response_headers_list
-        )
-        return response_data
+    @classmethod
+    def decode_payload(cls, body, lazy=False):
+        # mirrors aiohttp's response.json(), an empty body decodes to None
+        if not body or not body.strip():
+            return None
+        if lazy:
+            return cls._parser.lazy_load(body)
+        return json.loads(body)
+
+    @classmethod
+    def cache_stats(cls):
+        return cls._cache.stats() if cls._cache is not None else None
+
+    @classmethod
+    async def map(
+            cls,
+            method: str,
+            path: str,
+            items,
+            concurrency=10,
+            stop_on_error=False,
+            **request_kwargs
+    ):
+        """
+        Call one endpoint for many items with bounded concurrency
+
+            async for sku_id, response in Client.map("get", "/v1/skus/{}", sku_ids, concurrency=20):
+                ...
+
+        A plain item is formatted into ``path``; a dict item holds ``request`` kwargs (path,
+        data, query_params, headers...) overriding ``request_kwargs``. Results are yielded as
+        ``(item, AsyncTaskResponse)`` in completion order; a failed call yields its exception
+        unless ``stop_on_error`` is set, which raises it and cancels the calls still running.
+        """
+        limit_per_host = cls._bulk_limit_per_host or SessionManager.get_config().get("BULK_LIMIT_PER_HOST")
+        host_semaphore = get_host_semaphore(cls.get_upstream_key(), limit_per_host) if limit_per_host else None
+
+        async def call(item):
+            kwargs = dict(request_kwargs)
+            if isinstance(item, dict):
+                kwargs.update(item)
+            else:
+                kwargs["path"] = path.format(item)
+            kwargs.setdefault("path", path)
+            if kwargs.get("headers"):
+                # get_request_headers fills in the global headers, keep every call's dict private
+                kwargs["headers"] = dict(kwargs["headers"])
+            if host_semaphore is None:
+                return await cls.request(method, **kwargs)
+            async with host_semaphore:
+                return await cls.request(method, **kwargs)
+
+        async for item, result in bounded_map(call, items, concurrency, stop_on_error):
+            yield item, result
 
     @classmethod
     def parse_response(cls, response, status_code, headers, response_headers_list):
@@ -118,6 +599,14 @@ class BaseHttpRequest:
         response_timeout = timeout or cls._timeout
         return response_timeout
 
+    @classmethod
+    def apply_deadline(cls, timeout, headers):
+        """
+        Hook to fit an outgoing call into the incoming request's deadline, see BaseApiRequest
+        :return: (timeout, headers)
+        """
+        return timeout, headers
+
     @classmethod
     def build_query_params(cls, url, query_params):
         if query_params:
@@ -151,6 +640,11 @@ class BaseHttpRequest:
         headers=None,
         multipart=False,
         response_headers_list=None,
+        use_cache=True,
+        coalesce=None,
+        retry_policy: RetryPolicy = None,
+        hedge_policy: HedgePolicy = None,
+        lazy_decode=None,
     ):
         result = await cls.request(
             HTTPMethod.GET.value,
@@ -161,6 +655,11 @@ class BaseHttpRequest:
             headers=headers,
             multipart=multipart,
             response_headers_list=response_headers_list,
+            use_cache=use_cache,
+            coalesce=coalesce,
+            retry_policy=retry_policy,
+            hedge_policy=hedge_policy,
+            lazy_decode=lazy_decode,
         )
         return result
 
@@ -174,6 +673,7 @@ class BaseHttpRequest:
         headers=None,
         multipart=False,
         response_headers_list=None,
+        retry_policy: RetryPolicy = None,
     ):
         result = await cls.request(
             HTTPMethod.POST.value,
@@ -184,6 +684,7 @@ class BaseHttpRequest:
             headers=headers,
             multipart=multipart,
             response_headers_list=response_headers_list,
+            retry_policy=retry_policy,
         )
         return result
 
@@ -197,6 +698,7 @@ class BaseHttpRequest:
         headers=None,
         multipart=False,
         response_headers_list=None,
+        retry_policy: RetryPolicy = None,
     ):
         result = await cls.request(
             HTTPMethod.PUT.value,
@@ -207,6 +709,7 @@ class BaseHttpRequest:
             headers=headers,
             multipart=multipart,
             response_headers_list=response_headers_list,
+            retry_policy=retry_policy,
         )
         return result
 
@@ -220,6 +723,7 @@ class BaseHttpRequest:
         headers=None,
         multipart=False,
         response_headers_list=None,
+        retry_policy: RetryPolicy = None,
     ):
         result = await cls.request(
             HTTPMethod.PATCH.value,
@@ -230,6 +734,7 @@ class BaseHttpRequest:
             headers=headers,
             multipart=multipart,
             response_headers_list=response_headers_list,
+            retry_policy=retry_policy,
         )
         return result
 
@@ -243,6 +748,7 @@ class BaseHttpRequest:
         headers=None,
         multipart=False,
         response_headers_list=None,
+        retry_policy: RetryPolicy = None,
     ):
         result = await cls.request(
             HTTPMethod.DELETE.value,
@@ -253,5 +759,6 @@ class BaseHttpRequest:
             headers=headers,
             multipart=multipart,
             response_headers_list=response_headers_list,
+            retry_policy=retry_policy,
         )
         return result
@@ -0,0 +1,57 @@
+import asyncio
+import weakref
+
+_DONE = object()
+_HOST_SEMAPHORES = weakref.WeakKeyDictionary()
+
+
+def get_host_semaphore(host, limit):
+    """
+    Worker wide semaphore bounding the bulk calls in flight to one upstream host, kept per event
+    loop since asyncio primitives can not be shared across loops
+    """
+    semaphores = _HOST_SEMAPHORES.setdefault(asyncio.get_event_loop(), {})
+    semaphore = semaphores.get((host, limit))
+    if semaphore is None:
+        semaphore = semaphores[(host, limit)] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+async def bounded_map(func, items, concurrency, stop_on_error=False):
+    """
+    Run ``func(item)`` for every item with at most ``concurrency`` calls in flight and yield
+    ``(item, result)`` pairs in completion order. Items are pulled lazily, so generators work.
+
+    A failed call yields its exception as the result, unless ``stop_on_error`` is set, in which
+    case the exception is raised and the remaining calls are cancelled.
+    """
+    queue = asyncio.Queue()
+    pending_items = iter(items)
+
+    async def worker():
+        try:
+            for item in pending_items:
+                try:
+                    result = await func(item)
+                except Exception as exception:
+                    result = exception
+                queue.put_nowait((item, result))
+        finally:
+            queue.put_nowait(_DONE)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))]
+    try:
+        running = len(workers)
+        while running:
+            entry = await queue.get()
+            if entry is _DONE:
+                running -= 1
+                continue
+            item, result = entry
+            if stop_on_error and isinstance(result, Exception):
+                raise result
+            yield item, result
+    finally:
+        for _worker in workers:
+            if not _worker.done():
+                _worker.cancel()
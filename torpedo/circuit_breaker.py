@@ -0,0 +1,194 @@
+import time
+from collections import deque
+
+from .clients import apm_client
+from .common_utils import log_combined_message
+from .constants import CircuitBreakerState, LogLevel
+from .exceptions import CircuitBreakerOpenException
+
+
+class HostCircuit:
+    """
+    Circuit of a single upstream host. Outcomes are aggregated in one second buckets over a
+    sliding window so memory stays constant whatever the request rate is.
+
+    ``before_request`` returns a probe token for calls let through while half open, which the
+    caller hands back with the outcome; only those outcomes decide whether the circuit closes or
+    opens again, results of calls started before it tripped are ignored while half open.
+    """
+
+    def __init__(self, host, breaker):
+        self.host = host
+        self._breaker = breaker
+        self._buckets = deque()  # [second, total, errors, timeouts]
+        self._state = CircuitBreakerState.CLOSED
+        self._opened_at = 0
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        # bumped on every transition, identifies the half open period a probe belongs to
+        self._generation = 0
+
+    @property
+    def state(self):
+        return self._state
+
+    def before_request(self):
+        """
+        :return: probe token to pass to release / record_*, None unless the circuit is half open
+        """
+        if self._state == CircuitBreakerState.OPEN:
+            if time.monotonic() - self._opened_at < self._breaker.open_duration:
+                self._breaker.rejected += 1
+                raise CircuitBreakerOpenException(
+                    {"message": "Circuit breaker open for upstream {}".format(self.host)}
+                )
+            self._transition(CircuitBreakerState.HALF_OPEN)
+
+        if self._state == CircuitBreakerState.HALF_OPEN:
+            if self._half_open_calls >= self._breaker.half_open_max_calls:
+                self._breaker.rejected += 1
+                raise CircuitBreakerOpenException(
+                    {"message": "Circuit breaker half open for upstream {}".format(self.host)}
+                )
+            self._half_open_calls += 1
+            return self._generation
+        return None
+
+    def _is_probe(self, probe):
+        return self._state == CircuitBreakerState.HALF_OPEN and probe is not None and probe == self._generation
+
+    def release(self, probe=None):
+        # the call was abandoned (cancelled) before producing an outcome
+        if self._is_probe(probe) and self._half_open_calls:
+            self._half_open_calls -= 1
+
+    def record_result(self, status_code, probe=None):
+        if status_code >= 500:
+            self.record_failure(probe)
+        else:
+            self._record(error=False, timeout=False, probe=probe)
+
+    def record_failure(self, probe=None):
+        self._record(error=True, timeout=False, probe=probe)
+
+    def record_timeout(self, probe=None):
+        self._record(error=True, timeout=True, probe=probe)
+
+    def _record(self, error, timeout, probe=None):
+        if self._state == CircuitBreakerState.HALF_OPEN:
+            if not self._is_probe(probe):
+                # a call started before the circuit tripped, it says nothing about the recovery
+                return
+            self.release(probe)
+            if error:
+                self._transition(CircuitBreakerState.OPEN)
+                return
+            self._half_open_successes += 1
+            if self._half_open_successes >= self._breaker.half_open_max_calls:
+                self._transition(CircuitBreakerState.CLOSED)
+            return
+
+        second = int(time.monotonic())
+        if self._buckets and self._buckets[-1][0] == second:
+            bucket = self._buckets[-1]
+        else:
+            bucket = [second, 0, 0, 0]
+            self._buckets.append(bucket)
+        bucket[1] += 1
+        bucket[2] += int(error)
+        bucket[3] += int(timeout)
+
+        if self._state == CircuitBreakerState.CLOSED and error and self._should_trip(second):
+            self._transition(CircuitBreakerState.OPEN)
+
+    def _counts(self, now):
+        while self._buckets and self._buckets[0][0] <= now - self._breaker.window:
+            self._buckets.popleft()
+        total = errors = timeouts = 0
+        for _, _total, _errors, _timeouts in self._buckets:
+            total += _total
+            errors += _errors
+            timeouts += _timeouts
+        return total, errors, timeouts
+
+    def _should_trip(self, now):
+        total, errors, timeouts = self._counts(now)
+        if total < self._breaker.min_requests:
+            return False
+        return (
+            errors / total >= self._breaker.error_rate_threshold
+            or timeouts / total >= self._breaker.timeout_rate_threshold
+        )
+
+    def _transition(self, state):
+        previous, self._state = self._state, state
+        self._generation += 1
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        if state == CircuitBreakerState.OPEN:
+            self._opened_at = time.monotonic()
+        if state == CircuitBreakerState.CLOSED:
+            self._buckets.clear()
+        self._breaker.on_state_change(self.host, previous, state)
+
+    def stats(self):
+        total, errors, timeouts = self._counts(int(time.monotonic()))
+        return {"state": self._state.value, "requests": total, "errors": errors, "timeouts": timeouts}
+
+
+class CircuitBreaker:
+    """
+    Per host circuit breaker for inter service clients, enabled on a client class with
+    ``_circuit_breaker = CircuitBreaker(...)``.
+
+    A host trips open once at least ``min_requests`` calls were seen in the last ``window``
+    seconds and either the error rate (connection errors, timeouts and 5xx) or the timeout rate
+    crosses its threshold. Calls to an open host fail fast with CircuitBreakerOpenException.
+    After ``open_duration`` seconds up to ``half_open_max_calls`` probe calls are let through;
+    if all of them succeed the circuit closes, any failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name=None,
+        window=30,
+        min_requests=20,
+        error_rate_threshold=0.5,
+        timeout_rate_threshold=0.5,
+        open_duration=10,
+        half_open_max_calls=1,
+    ):
+        self.name = name
+        self.window = window
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.timeout_rate_threshold = timeout_rate_threshold
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self.rejected = 0
+        self._circuits = {}
+
+    def for_host(self, host):
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = HostCircuit(host, self)
+        return circuit
+
+    def on_state_change(self, host, previous, state):
+        level = LogLevel.WARNING.value if state == CircuitBreakerState.OPEN else LogLevel.INFO.value
+        log_combined_message(
+            "Circuit breaker state change",
+            "{} {}: {} -> {}".format(self.name or "client", host, previous.value, state.value),
+            level=level,
+        )
+        if state == CircuitBreakerState.OPEN:
+            apm_client.capture_message(
+                message="Circuit breaker opened for upstream {}".format(host),
+                level=LogLevel.WARNING.value,
+            )
+
+    def stats(self):
+        return {
+            "rejected": self.rejected,
+            "hosts": {host: circuit.stats() for host, circuit in self._circuits.items()},
+        }
@@ -16,7 +16,8 @@ import elasticapm
 
 from torpedo.constants import LogLevel
 from . import enums
-import ujson
+from . import json_codec
+from . import request_context as request_context_store
 from sanic.log import logger
 
 from torpedo.exceptions import ForbiddenException
@@ -46,7 +47,7 @@ def json_file_to_dict(_file: str) -> dict:
     config = None
     try:
         with open(_file) as config_file:
-            config = ujson.load(config_file)
+            config = json_codec.loads(config_file.read())
     except (TypeError, FileNotFoundError, ValueError) as exception:
         print(exception)
 
@@ -57,6 +58,9 @@ class CONFIG:
     config = json_file_to_dict("./config.json")
 
 
+json_codec.use_backend((CONFIG.config or {}).get("JSON_CODEC"))
+
+
 def log_combined_message(title, error, level=LogLevel.ERROR.value):
     request_params = {"exception": error}
     logger_with_level_fn = getattr(logger, level)
@@ -97,12 +101,15 @@ class ServiceAttribute:
     port = ""
     branch_name = ""
     current_tag = ""
+    # "host:port", built once for every log record
+    address = ":"
 
     @classmethod
     def setup_attributes(cls, _app):
         cls.name = _app.name
         cls.host = socket.gethostbyname(socket.gethostname())
         cls.port = CONFIG.config.get('PORT')
+        cls.address = '{}:{}'.format(cls.host, cls.port)
         cls.branch_name, cls.current_tag = cls._get_current_working_repo()
 
     @classmethod
@@ -128,10 +135,17 @@ def set_clients_host_for_tests(path, port):
     for key, _client in _clients.items():
         _host = _client.__dict__.get("_host", None)
         if _host:
-            _res = urlparse(_host)
-            _client._host = _host.replace(
-                _res.scheme + "://" + _res.netloc, "http://127.0.0.1:{}".format(port)
-            )
+            _client._host = _replace_origin(_host, port)
+        _hosts = _client.__dict__.get("_hosts", None)
+        if _hosts:
+            _client._hosts = [_replace_origin(_endpoint, port) for _endpoint in _hosts]
+
+
+def _replace_origin(_host, port):
+    _res = urlparse(_host)
+    if _res.scheme == "unix":
+        return "http://127.0.0.1:{}".format(port)
+    return _host.replace(_res.scheme + "://" + _res.netloc, "http://127.0.0.1:{}".format(port))
 
 
 def import_submodules(package):
@@ -228,8 +242,12 @@ def get_user_from_header(headers):
     """
     user = None
     shared_context = headers.get("X-SHARED-CONTEXT", None)
-    if shared_context:
-        user = ujson.loads(shared_context).get("user_context", None)
+    request_context = request_context_store.current()
+    if shared_context and request_context is not None and shared_context == request_context.shared_context_header:
+        # the current request's header, parsed once per request
+        user = request_context.user
+    elif shared_context:
+        user = json_codec.loads(shared_context).get("user_context", None)
     if user:
         return user
     else:
@@ -0,0 +1,129 @@
+import asyncio
+from collections import deque
+
+from .exceptions import ConcurrencyLimitExceededException
+
+
+class HostLimiter:
+    """
+    AIMD limit of concurrent calls to one upstream host.
+
+    Every call that comes back in time grows the limit by 1 / limit (about +1 per round trip of
+    the whole window); a timeout, an overload status or a round trip slower than
+    ``latency_tolerance`` times the lowest observed round trip shrinks it by ``backoff_ratio``.
+    Callers over the limit wait in a bounded FIFO queue and are rejected straight away once it is
+    full, or after ``queue_timeout`` seconds of waiting.
+    """
+
+    def __init__(self, host, limiter):
+        self.host = host
+        self._limiter = limiter
+        self.limit = float(limiter.initial_limit)
+        self.in_flight = 0
+        self.min_rtt = None
+        self.rejected = 0
+        self._waiters = deque()
+
+    @property
+    def queue_depth(self):
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self._limiter.max_queue:
+            self.rejected += 1
+            raise ConcurrencyLimitExceededException(
+                {"message": "Too many pending requests for upstream {}".format(self.host)}
+            )
+
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self._limiter.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over right as the wait timed out, pass it on
+                self.release()
+            self.rejected += 1
+            raise ConcurrencyLimitExceededException(
+                {"message": "Timed out waiting for a request slot for upstream {}".format(self.host)}
+            )
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over right as the caller went away, pass it on
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, rtt=None, dropped=False):
+        self.in_flight -= 1
+        if rtt is not None:
+            self._adjust(rtt, dropped)
+        self._wake_waiters()
+
+    def _adjust(self, rtt, dropped):
+        limiter = self._limiter
+        if not dropped:
+            self.min_rtt = rtt if self.min_rtt is None else min(self.min_rtt, rtt)
+        if dropped or rtt > self.min_rtt * limiter.latency_tolerance:
+            self.limit = max(limiter.min_limit, self.limit * limiter.backoff_ratio)
+        elif self.in_flight + 1 >= int(self.limit):
+            # only grow while the current limit is actually being used
+            self.limit = min(limiter.max_limit, self.limit + 1.0 / self.limit)
+
+    def _wake_waiters(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def stats(self):
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "min_rtt": self.min_rtt,
+            "rejected": self.rejected,
+        }
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Adaptive per host concurrency limiter, enabled on a client class with
+    ``_concurrency_limiter = AdaptiveConcurrencyLimiter(...)``. It sits on top of the connector's
+    static CONCURRENCY_LIMIT / CONCURRENCY_LIMIT_HOST, which remain hard caps.
+    """
+
+    def __init__(
+        self,
+        initial_limit=20,
+        min_limit=1,
+        max_limit=200,
+        backoff_ratio=0.9,
+        latency_tolerance=2.0,
+        max_queue=50,
+        queue_timeout=None,
+    ):
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._hosts = {}
+
+    def for_host(self, host):
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = self._hosts[host] = HostLimiter(host, self)
+        return limiter
+
+    def stats(self):
+        return {host: limiter.stats() for host, limiter in self._hosts.items()}
@@ -17,11 +17,31 @@ __all__ = [
     "X_SERVICE_NAME",
     "LogLevel",
     "CONTENT_TYPE",
-    "STATUS_CODE_4XX"
+    "STATUS_CODE_4XX",
+    "CACHE_CONTROL",
+    "ETAG",
+    "LAST_MODIFIED",
+    "VARY",
+    "IF_NONE_MATCH",
+    "IF_MODIFIED_SINCE",
+    "CircuitBreakerState",
+    "X_REQUEST_DEADLINE",
+    "REQUEST_DEADLINE",
+    "LoadBalancingStrategy",
+    "CONTENT_LENGTH",
+    "CONTENT_ENCODING",
+    "CONTENT_DISPOSITION",
+    "LogOverflowPolicy",
+    "MiddlewareStage",
+    "AUTHORIZATION",
+    "COOKIE"
 ]
     
 
 from .constant import (STATUS_CODE_MAPPING, X_HEADERS, X_REQUEST_ID, X_VISITOR_ID, X_SOURCE_IP, X_SOURCE_REFERER,
                        X_SOURCE_USER_AGENT, GLOBAL_HEADERS, X_SHARED_CONTEXT, Constant, HTTPMethod, HTTPStatusCodes,
                        ListenerEventTypes, X_USER_AGENT, X_SERVICE_VERSION, X_SERVICE_NAME, LogLevel, CONTENT_TYPE,
-                       STATUS_CODE_4XX)
+                       STATUS_CODE_4XX, CACHE_CONTROL, ETAG, LAST_MODIFIED, VARY, IF_NONE_MATCH, IF_MODIFIED_SINCE,
+                       CircuitBreakerState, X_REQUEST_DEADLINE, REQUEST_DEADLINE, LoadBalancingStrategy,
+                       CONTENT_LENGTH, CONTENT_ENCODING, CONTENT_DISPOSITION, LogOverflowPolicy,
+                       MiddlewareStage, AUTHORIZATION, COOKIE)
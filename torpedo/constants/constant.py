@@ -11,9 +11,22 @@ X_SOURCE_USER_AGENT = 'X-SOURCE-USER-AGENT'
 X_SOURCE_REFERER = 'X-SOURCE-REFERER'
 X_SERVICE_NAME = 'X-SERVICE-NAME'
 X_SERVICE_VERSION = 'X-SERVICE-VERSION'
+X_REQUEST_DEADLINE = 'X-REQUEST-DEADLINE'
 CONTENT_TYPE = 'Content-Type'
+CACHE_CONTROL = 'Cache-Control'
+ETAG = 'ETag'
+LAST_MODIFIED = 'Last-Modified'
+VARY = 'Vary'
+IF_NONE_MATCH = 'If-None-Match'
+IF_MODIFIED_SINCE = 'If-Modified-Since'
+CONTENT_LENGTH = 'Content-Length'
+CONTENT_ENCODING = 'Content-Encoding'
+CONTENT_DISPOSITION = 'Content-Disposition'
+AUTHORIZATION = 'Authorization'
+COOKIE = 'Cookie'
 
 GLOBAL_HEADERS = 'global_headers'
+REQUEST_DEADLINE = 'request_deadline'
 
 
 class Constant(Enum):
@@ -30,6 +43,9 @@ class HTTPStatusCodes(Enum):
     MOVED_TEMPORARILY = 302
     INTERNAL_SERVER_ERROR = 500
     REQUEST_TIMEOUT = 408
+    NOT_MODIFIED = 304
+    SERVICE_UNAVAILABLE = 503
+    GATEWAY_TIMEOUT = 504
 
 
 class HTTPMethod(Enum):
@@ -56,3 +72,27 @@ class LogLevel(Enum):
     INFO = "info"
     WARNING = "warning"
     ERROR = "error"
+
+
+class LogOverflowPolicy(Enum):
+    DROP = "drop"
+    BLOCK = "block"
+    SAMPLE = "sample"
+
+
+class MiddlewareStage(Enum):
+    REQUEST_ID = "request_id"
+    TIMING = "timing"
+    DEADLINE = "deadline"
+    GLOBAL_HEADERS = "global_headers"
+
+
+class CircuitBreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class LoadBalancingStrategy(Enum):
+    LEAST_OUTSTANDING = "least_outstanding"
+    POWER_OF_TWO_CHOICES = "p2c"
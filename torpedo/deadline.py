@@ -0,0 +1,32 @@
+import time
+
+from . import request_context as context
+from .constants import REQUEST_DEADLINE
+
+
+def parse_deadline_header(value):
+    """
+    X-REQUEST-DEADLINE carries the remaining budget of the caller in milliseconds. A relative
+    budget is used instead of a timestamp so clock skew between hosts does not matter.
+    :return: budget in seconds or None when absent / malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value) / 1000)
+    except (TypeError, ValueError):
+        return None
+
+
+def set_request_deadline(budget):
+    context.set(REQUEST_DEADLINE, time.monotonic() + budget)
+
+
+def get_remaining_budget():
+    """
+    :return: seconds left before the current request's deadline, None if it has none
+    """
+    deadline = context.get(REQUEST_DEADLINE)
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
@@ -3,15 +3,29 @@ from functools import wraps
 from torpedo import send_response, get_error_body_response
 from torpedo.exceptions import *
 from torpedo.common_utils import call_anonymous_function
+from torpedo.offload import Offloader
 
 from torpedo.handlers import get_error_body_response
 
 class APIRequestDecorator:
     
     @classmethod
-    def api_request_handler(cls, func):
+    def api_request_handler(cls, func=None, blocking=False):
+        """
+        Wraps the handler's result in torpedo's response envelope. With blocking=True the
+        (plain, not async) handler runs in the Offloader's thread pool:
+
+            @APIRequestDecorator.api_request_handler(blocking=True)
+            def render_report(request): ...
+        """
+        if func is None:
+            return lambda handler: cls.api_request_handler(handler, blocking=blocking)
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            result = await call_anonymous_function(func, *args, **kwargs)
+            if blocking:
+                result = await Offloader.run(func, *args, **kwargs)
+            else:
+                result = await call_anonymous_function(func, *args, **kwargs)
             return send_response(result)
         return wrapper
@@ -54,6 +54,28 @@ class TaskExecutorException(BaseSanicException):
         super().__init__(error, status_code, meta, quiet)
 
 
+class TaskDependencyFailedException(TaskExecutorException):
+    """
+    Result of a task that was not run because a task it depends on failed
+    """
+
+
+class TaskTimeoutException(TaskExecutorException):
+    """
+    Result of a task that ran past its own timeout, the executor's deadline or the grace period
+    left to optional tasks once the main tasks finished
+    """
+
+    def __init__(
+        self,
+        error,
+        status_code=HTTPStatusCodes.GATEWAY_TIMEOUT.value,
+        meta=None,
+        quiet=True,
+    ):
+        super().__init__(error, status_code, meta, quiet)
+
+
 class HTTPInterServiceRequestException(BaseSanicException):
     def __init__(
         self,
@@ -89,6 +111,39 @@ class HTTPRequestTimeoutException(BaseSanicException):
         super().__init__(error, status_code, meta, quiet)
 
 
+class CircuitBreakerOpenException(BaseSanicException):
+    def __init__(
+        self,
+        error,
+        status_code=HTTPStatusCodes.SERVICE_UNAVAILABLE.value,
+        meta=None,
+        quiet=True,
+    ):
+        super().__init__(error, status_code, meta, quiet)
+
+
+class ConcurrencyLimitExceededException(BaseSanicException):
+    def __init__(
+        self,
+        error,
+        status_code=HTTPStatusCodes.SERVICE_UNAVAILABLE.value,
+        meta=None,
+        quiet=True,
+    ):
+        super().__init__(error, status_code, meta, quiet)
+
+
+class DeadlineExceededException(BaseSanicException):
+    def __init__(
+        self,
+        error,
+        status_code=HTTPStatusCodes.GATEWAY_TIMEOUT.value,
+        meta=None,
+        quiet=True,
+    ):
+        super().__init__(error, status_code, meta, quiet)
+
+
 class BadRequestException(BaseSanicException):
     def __init__(
         self,
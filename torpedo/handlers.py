@@ -4,11 +4,13 @@ from sanic.exceptions import (Forbidden, MethodNotSupported, NotFound,
                               ServerError, ServiceUnavailable, Unauthorized)
 from sanic.handlers import ErrorHandler
 from sanic.log import error_logger
-from sanic.response import json
+from sanic.response import HTTPResponse, json as sanic_json
 
+from . import json_codec
 from .clients import apm_client
 from .common_utils import ServiceAttribute
-from .constants import STATUS_CODE_MAPPING, HTTPStatusCodes, STATUS_CODE_4XX
+from .constants import STATUS_CODE_MAPPING, HTTPStatusCodes, STATUS_CODE_4XX, MiddlewareStage
+from .middlewares import skip_middleware_stages
 from .exceptions import (BadRequestException, HTTPInterServiceRequestException,
                          JsonDecodeException, NotFoundException, ForbiddenException)
 
@@ -18,9 +20,23 @@ from tortoise.exceptions import (BaseORMException, FieldError, ParamsError, Conf
                                  IncompleteInstanceError, DBConnectionError, ValidationError)
 
 
+def json(body, status=HTTPStatusCodes.SUCCESS.value, headers=None):
+    # serialize straight to bytes with torpedo's json codec, Sanic passes bytes bodies through
+    return sanic_json(body, status=status, headers=headers, dumps=json_codec.dumps_bytes)
+
+
+def raw_json_response(data: json_codec.RawJson, status_code, meta=None, headers=None):
+    # splice the upstream's encoded data into the envelope, key order matches send_response
+    body = b'{"data":%s,"is_success":true,"status_code":%d' % (data.raw, status_code)
+    if meta:
+        body += b',"meta":' + json_codec.dumps_bytes(meta)
+    return HTTPResponse(body + b"}", status=status_code, headers=headers, content_type="application/json")
+
+
 def send_response(data=None, status_code=HTTPStatusCodes.SUCCESS.value, meta=None, body: dict = None, headers=None, purge_response_keys=False):
     """
-    :param data: final response data
+    :param data: final response data, a RawJson (AsyncTaskResponse.raw_data of a lazily decoded
+        upstream response) is passed through without decoding it
     :param status_code: success status code, default is 200
     :param body: Optional: Response body dict in v4 format.
     :param headers: Optional : Response headers to be sent to clients.
@@ -32,6 +48,10 @@ def send_response(data=None, status_code=HTTPStatusCodes.SUCCESS.value, meta=Non
         return json(body=body, status=body["status_code"])
 
     status_code = STATUS_CODE_MAPPING.get(status_code) or status_code
+    if isinstance(data, json_codec.RawJson):
+        if not purge_response_keys:
+            return raw_json_response(data, status_code, meta=meta, headers=headers)
+        data = data.decode()
     data = {"data": data, "is_success": True, "status_code": status_code}
     if meta:
         data["meta"] = meta
@@ -77,6 +97,8 @@ def get_error_body_response(error: str, status_code, meta=None, error_id=None):
     return json(body=error_result, status=status_code)
 
 
+# health checks make no upstream calls
+@skip_middleware_stages(MiddlewareStage.DEADLINE, MiddlewareStage.GLOBAL_HEADERS)
 async def ping(request):
     return json({"ping": "pong"}, status=HTTPStatusCodes.SUCCESS.value)
 
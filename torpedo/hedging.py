@@ -0,0 +1,88 @@
+from collections import deque
+
+from .retry_policy import RetryBudget
+
+
+class LatencyTracker:
+    """
+    Keeps the last ``size`` latencies of a host and serves percentiles from them. The sorted
+    snapshot is rebuilt every ``refresh_every`` samples instead of on every lookup.
+    """
+
+    def __init__(self, size=200, refresh_every=20):
+        self._samples = deque(maxlen=size)
+        self._refresh_every = refresh_every
+        self._since_refresh = 0
+        self._sorted = []
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, latency):
+        self._samples.append(latency)
+        self._since_refresh += 1
+
+    def percentile(self, percentile):
+        if not self._samples:
+            return None
+        if self._since_refresh >= self._refresh_every or not self._sorted:
+            self._sorted = sorted(self._samples)
+            self._since_refresh = 0
+        index = min(len(self._sorted) - 1, int(percentile * len(self._sorted)))
+        return self._sorted[index]
+
+
+class HedgePolicy:
+    """
+    Hedging for idempotent GETs, set on a client class as ``_hedge_policy`` or passed per call to
+    ``get`` as ``hedge_policy``.
+
+    If the first attempt has not answered after ``delay`` seconds (or, when ``delay`` is None, the
+    tracked ``percentile`` latency of the host) a second attempt is sent and the first successful
+    response wins, the other one is cancelled. Hedges draw from a RetryBudget so the extra load
+    stays around ``budget.ratio`` of the traffic.
+    """
+
+    def __init__(self, delay=None, percentile=0.95, min_delay=0.005, min_samples=20, budget=None):
+        self.delay = delay
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.budget = budget or RetryBudget(ratio=0.05, min_retries_per_second=1, capacity=10)
+        self.requests = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self._latencies = {}
+
+    def get_delay(self, host):
+        if self.delay is not None:
+            return self.delay
+        tracker = self._latencies.get(host)
+        if tracker is None or len(tracker) < self.min_samples:
+            return None
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def record_latency(self, host, latency):
+        tracker = self._latencies.get(host)
+        if tracker is None:
+            tracker = self._latencies[host] = LatencyTracker()
+        tracker.add(latency)
+
+    def on_request(self):
+        self.requests += 1
+        self.budget.deposit()
+
+    def can_hedge(self):
+        if not self.budget.withdraw():
+            return False
+        self.hedges += 1
+        return True
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "budget": self.budget.stats(),
+            "delays": {host: self.get_delay(host) for host in self._latencies},
+        }
@@ -2,6 +2,7 @@ from sanic import Sanic
 from sanic.log import logger
 from sanic.request import Request
 from sanic.router import Router
+from sanic.server.socket import bind_unix_socket, remove_unix_socket
 from sanic_openapi import openapi3_blueprint
 from tortoise.contrib.sanic import register_tortoise
 import sentry_sdk
@@ -11,9 +12,10 @@ from contextlib import suppress
 from .clients import CustomElasticAPM, apm_client
 from .common_utils import CONFIG, ServiceAttribute, set_clients_host_for_tests
 from .handlers import CustomExceptionHandler, ping
-from .listeners import set_context_factory
+from .listeners import open_http_sessions, close_http_sessions, start_unix_socket_server, \
+    stop_unix_socket_server, open_offload_pools, close_offload_pools, start_logging, stop_logging
 from .log import patch_logging
-from .middlewares import handle_request_id, add_start_time, add_response_time, global_headers_middleware_factory
+from .middlewares import torpedo_request_middleware, torpedo_response_middleware
 from .wrappers import custom_json, request_params
 
 
@@ -25,6 +27,8 @@ class Host:
     _name = None
     _host = "0.0.0.0"
     _port = None
+    _unix_socket = None
+    _unix_socket_only = False
     _workers = 1
     _debug = False
     _config = {}
@@ -43,6 +47,10 @@ class Host:
         cls._name = cls._config["NAME"]
         cls._host = cls._config["HOST"]
         cls._port = cls._config["PORT"]
+        # optional UNIX socket for co-located callers, served next to HOST/PORT or, with
+        # UNIX_SOCKET_ONLY, instead of them
+        cls._unix_socket = cls._config.get("UNIX_SOCKET")
+        cls._unix_socket_only = cls._config.get("UNIX_SOCKET_ONLY", False)
         cls._workers = cls._config.get("WORKERS", 2)  # number of workers to run,
         # keep <= num of cores debug would be true for local, make sure it is
         # false on staging and production. This flag also defines logging
@@ -71,17 +79,23 @@ class Host:
     def register_listeners(cls, _app):
         # registers custom listeners created via torpedo and custom listeners
         # set up by service.
-        _app.register_listener(set_context_factory, "after_server_start")
+        _app.register_listener(start_logging, "before_server_start")
+        _app.register_listener(open_http_sessions, "before_server_start")
+        _app.register_listener(close_http_sessions, "after_server_stop")
+        _app.register_listener(open_offload_pools, "before_server_start")
+        _app.register_listener(close_offload_pools, "after_server_stop")
+        _app.register_listener(stop_logging, "after_server_stop")
+        _app.register_listener(start_unix_socket_server, "after_server_start")
+        _app.register_listener(stop_unix_socket_server, "before_server_stop")
         for _listener, _type in cls._listeners:
             _app.register_listener(_listener, _type)
 
     @classmethod
     def register_middlewares(cls, _app):
-        # registers custom middleware created by torpedo.
-        _app.register_middleware(handle_request_id, attach_to="request")
-        _app.register_middleware(add_start_time, attach_to="request")
-        _app.register_middleware(global_headers_middleware_factory, attach_to="request")
-        _app.register_middleware(add_response_time, attach_to="response")
+        # registers custom middleware created by torpedo, all built-in request work is fused
+        # into one middleware, see skip_middleware_stages to opt routes out of stages.
+        _app.register_middleware(torpedo_request_middleware, attach_to="request")
+        _app.register_middleware(torpedo_response_middleware, attach_to="response")
 
     @classmethod
     def register_custom_middlewares(cls, _app):
@@ -173,7 +187,16 @@ class Host:
 
     @classmethod
     def run_server(cls, _app):
-        _app.run(host=cls._host, port=cls._port, debug=cls._debug, workers=cls._workers)
+        if cls._unix_socket and cls._unix_socket_only:
+            _app.run(unix=cls._unix_socket, debug=cls._debug, workers=cls._workers)
+            return
+        if cls._unix_socket:
+            _app.ctx.unix_socket = bind_unix_socket(cls._unix_socket)
+        try:
+            _app.run(host=cls._host, port=cls._port, debug=cls._debug, workers=cls._workers)
+        finally:
+            if cls._unix_socket:
+                remove_unix_socket(cls._unix_socket)
 
     @classmethod
     def run(cls):
@@ -0,0 +1,75 @@
+"""
+Single JSON codec used by torpedo for request bodies, upstream responses, Sanic responses and
+log records.
+
+orjson is used when installed and torpedo falls back to ujson otherwise; values orjson can not
+serialize are retried with ujson. common_utils applies the JSON_CODEC key of config.json
+("orjson" or "ujson") once the config is loaded. Import the module and call through it
+(``json_codec.dumps(...)``) so the configured backend is picked up everywhere.
+"""
+import ujson
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+ORJSON = "orjson"
+UJSON = "ujson"
+
+BACKEND = None
+
+
+def _ujson_dumps(obj, default=None):
+    return ujson.dumps(obj, default=default, escape_forward_slashes=False, ensure_ascii=False)
+
+
+def _ujson_dumps_bytes(obj, default=None):
+    return _ujson_dumps(obj, default=default).encode()
+
+
+def _orjson_dumps_bytes(obj, default=None):
+    try:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # e.g. integers wider than 64 bits, which ujson still handles
+        return _ujson_dumps_bytes(obj, default=default)
+
+
+def _orjson_dumps(obj, default=None):
+    return _orjson_dumps_bytes(obj, default=default).decode()
+
+
+class RawJson:
+    """
+    An already encoded JSON value, decoded only when somebody needs the Python object.
+    send_response splices it into the response envelope as is.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+
+    def decode(self):
+        return loads(self.raw)
+
+
+def use_backend(name=None):
+    """
+    Bind the module level dumps(obj, default=None) -> str, dumps_bytes(obj, default=None) -> bytes
+    and loads(str or bytes) to the requested backend
+    """
+    global BACKEND, dumps, dumps_bytes, loads
+    if name is None:
+        name = ORJSON if orjson is not None else UJSON
+    if name == ORJSON and orjson is not None:
+        BACKEND = ORJSON
+        dumps, dumps_bytes, loads = _orjson_dumps, _orjson_dumps_bytes, orjson.loads
+    else:
+        BACKEND = UJSON
+        dumps, dumps_bytes, loads = _ujson_dumps, _ujson_dumps_bytes, ujson.loads
+    return BACKEND
+
+
+use_backend()
@@ -1,10 +1,76 @@
-import aiotask_context as context
+import asyncio
+import time
 
+from sanic.log import logger
+from sanic.server import serve
+
+from .common_utils import CONFIG
 from .exceptions import BadRequestException, JsonDecodeException
+from .log import start_log_pipeline, stop_log_pipeline, start_log_sampling, stop_log_sampling
+from .offload import Offloader
+from .session_manager import SessionManager
+
+
+async def open_http_sessions(_app, loop):
+    await SessionManager.open()
+
+
+async def close_http_sessions(_app, loop):
+    await SessionManager.close()
+
+
+async def open_offload_pools(_app, loop):
+    await Offloader.open()
+
+
+async def close_offload_pools(_app, loop):
+    await Offloader.close()
+
+
+async def start_logging(_app, loop):
+    config = CONFIG.config or {}
+    # like patch_logging, the LOGGING options only apply to the JSON logging set up without DEBUG
+    if config.get("DEBUG"):
+        return
+    start_log_pipeline(config)
+    start_log_sampling(config)
+
+
+async def stop_logging(_app, loop):
+    stop_log_sampling()
+    stop_log_pipeline()
+
+
+async def start_unix_socket_server(_app, loop):
+    # the socket is bound once in the main process by Host.run_server, every worker accepts on it
+    sock = getattr(_app.ctx, "unix_socket", None)
+    if sock is None:
+        return
+    asyncio_server = await serve(None, None, _app, sock=sock, loop=loop, run_async=True)
+    _app.ctx.unix_server = asyncio_server.server
+    _app.ctx.unix_connections = asyncio_server.connections
+    logger.info("Serving on unix socket {}".format(sock.getsockname()))
 
 
-async def set_context_factory(_app, loop):
-    loop.set_task_factory(context.task_factory)
+async def stop_unix_socket_server(_app, loop):
+    server = getattr(_app.ctx, "unix_server", None)
+    if server is None:
+        return
+    server.close()
+    # drain the accepted keep-alive connections like Sanic does for its main server, wait_closed
+    # waits for them on python 3.12+
+    connections = _app.ctx.unix_connections
+    for connection in list(connections):
+        connection.close_if_idle()
+    deadline = time.monotonic() + _app.config.GRACEFUL_SHUTDOWN_TIMEOUT
+    while connections and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    for connection in list(connections):
+        if getattr(connection, "websocket", None):
+            connection.websocket.fail_connection(code=1001)
+        else:
+            connection.abort()
+    await server.wait_closed()
 
 
 def before_send(event, hint):
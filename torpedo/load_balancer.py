@@ -0,0 +1,146 @@
+import random
+import time
+
+from yarl import URL
+
+from .common_utils import log_combined_message
+from .constants import LoadBalancingStrategy, LogLevel
+
+
+class Endpoint:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.url = URL(base_url)
+        self.outstanding = 0
+        self.latency = None  # exponentially weighted moving average, seconds
+        self.consecutive_failures = 0
+        self.ejected_until = 0
+
+    def is_ejected(self, now):
+        return now < self.ejected_until
+
+    def rewrite(self, url):
+        """
+        Point ``url``, built on the client's logical ``_host``, at this endpoint's origin
+        """
+        return URL.build(
+            scheme=self.url.scheme,
+            host=self.url.raw_host,
+            port=self.url.explicit_port,
+            path=url.raw_path,
+            query_string=url.raw_query_string,
+            encoded=True,
+        )
+
+    def stats(self):
+        return {
+            "outstanding": self.outstanding,
+            "latency": self.latency,
+            "consecutive_failures": self.consecutive_failures,
+            "ejected": self.is_ejected(time.monotonic()),
+        }
+
+
+class LoadBalancer:
+    """
+    Client side load balancing over the upstream origins a client class lists in ``_hosts``
+    (``_host`` keeps the base path, only the origin is swapped per call).
+
+    Endpoints are picked by least outstanding requests or power of two choices. An endpoint is
+    ejected for ``ejection_time`` seconds after ``consecutive_failures`` failed calls in a row
+    (connection errors, timeouts, 5xx) or when its average latency grows beyond
+    ``latency_factor`` times the fastest healthy endpoint's; at most ``max_ejection_ratio`` of
+    the endpoints are ejected at any time.
+    """
+
+    def __init__(
+        self,
+        strategy=LoadBalancingStrategy.POWER_OF_TWO_CHOICES,
+        consecutive_failures=5,
+        latency_factor=5.0,
+        ejection_time=30,
+        max_ejection_ratio=0.5,
+        ewma_weight=0.2,
+    ):
+        self.strategy = LoadBalancingStrategy(strategy)
+        self.consecutive_failures = consecutive_failures
+        self.latency_factor = latency_factor
+        self.ejection_time = ejection_time
+        self.max_ejection_ratio = max_ejection_ratio
+        self.ewma_weight = ewma_weight
+        self.ejections = 0
+        self._endpoints = {}
+
+    def get_endpoints(self, base_urls):
+        endpoints = []
+        for base_url in base_urls:
+            endpoint = self._endpoints.get(base_url)
+            if endpoint is None:
+                endpoint = self._endpoints[base_url] = Endpoint(base_url)
+            endpoints.append(endpoint)
+        return endpoints
+
+    def choose(self, base_urls):
+        endpoints = self.get_endpoints(base_urls)
+        now = time.monotonic()
+        candidates = [endpoint for endpoint in endpoints if not endpoint.is_ejected(now)] or endpoints
+        if len(candidates) == 1:
+            endpoint = candidates[0]
+        elif self.strategy == LoadBalancingStrategy.LEAST_OUTSTANDING:
+            fewest = min(endpoint.outstanding for endpoint in candidates)
+            endpoint = random.choice([endpoint for endpoint in candidates if endpoint.outstanding == fewest])
+        else:
+            first, second = random.sample(candidates, 2)
+            endpoint = first if self._load(first) <= self._load(second) else second
+        endpoint.outstanding += 1
+        return endpoint
+
+    @staticmethod
+    def _load(endpoint):
+        return endpoint.outstanding, endpoint.latency or 0
+
+    def release(self, endpoint, latency=None, failed=False):
+        endpoint.outstanding -= 1
+        if latency is None:
+            return
+        if failed:
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.consecutive_failures:
+                self._eject(endpoint, "{} consecutive failures".format(endpoint.consecutive_failures))
+            return
+
+        endpoint.consecutive_failures = 0
+        if endpoint.latency is None:
+            endpoint.latency = latency
+        else:
+            endpoint.latency += self.ewma_weight * (latency - endpoint.latency)
+        now = time.monotonic()
+        healthy = [
+            peer.latency for peer in self._endpoints.values()
+            if peer is not endpoint and peer.latency is not None and not peer.is_ejected(now)
+        ]
+        if healthy and endpoint.latency > self.latency_factor * min(healthy):
+            self._eject(endpoint, "latency {:.3f}s".format(endpoint.latency))
+
+    def _eject(self, endpoint, reason):
+        now = time.monotonic()
+        if endpoint.is_ejected(now):
+            return
+        ejected = sum(1 for peer in self._endpoints.values() if peer.is_ejected(now))
+        if ejected + 1 > self.max_ejection_ratio * len(self._endpoints):
+            return
+        endpoint.ejected_until = now + self.ejection_time
+        endpoint.consecutive_failures = 0
+        # forget the slow average, the endpoint gets a fresh start once it is back
+        endpoint.latency = None
+        self.ejections += 1
+        log_combined_message(
+            "Upstream endpoint ejected", "{} for {}s: {}".format(endpoint.base_url, self.ejection_time, reason),
+            level=LogLevel.WARNING.value,
+        )
+
+    def stats(self):
+        return {
+            "ejections": self.ejections,
+            "endpoints": {base_url: endpoint.stats() for base_url, endpoint in self._endpoints.items()},
+        }
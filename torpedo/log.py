@@ -1,16 +1,28 @@
 import logging
+import math
+import queue
+import random
+import threading
+import time
+import traceback
+import types
+from datetime import date, datetime, time as datetime_time
 from enum import Enum
-import json
 from collections import OrderedDict
 from urllib.parse import urlparse
 
-import aiotask_context as context
 from pythonjsonlogger import jsonlogger
 
+from . import json_codec, request_context as context
 from .common_utils import ServiceAttribute
+from .constants import LogOverflowPolicy
+from .offload import get_offloaded_request_id
 from sanic.http import Http
 
 
+ACCESS_LOGGER = 'sanic.access'
+
+
 class LogType(Enum):
     ACCESS_LOG = 'access'
     CUSTOM_LOG = 'custom'
@@ -18,9 +30,26 @@ class LogType(Enum):
     EXTERNAL_CALL_LOG = 'external'
 
 
+def json_log_default(obj):
+    """
+    ``default`` of the JSON codec for log records, serializes what python-json-logger's
+    JsonEncoder did: dates as isoformat, tracebacks as text and anything else as str()
+    """
+    if isinstance(obj, (date, datetime, datetime_time)):
+        return obj.isoformat()
+    if isinstance(obj, types.TracebackType):
+        return "".join(traceback.format_tb(obj)).strip()
+    try:
+        return str(obj)
+    except Exception:
+        return None
+
+
 class CustomTimeLoggingFormatter(jsonlogger.JsonFormatter):
     def __init__(self, *args, **kwargs):
         super(CustomTimeLoggingFormatter, self).__init__(*args, **kwargs)
+        if self.json_default is None:
+            self.json_default = json_log_default
         self.datefmt = "%Y-%m-%dT%H:%M:%S"
         self.rename_fields = {
             "levelname": "loglevel",
@@ -42,7 +71,7 @@ class CustomTimeLoggingFormatter(jsonlogger.JsonFormatter):
         """Formats a log record and serializes to json"""
         message_dict = {}
         if isinstance(record.msg, dict):
-            record.message = json.dumps(record.msg)
+            record.message = json_codec.dumps(record.msg, default=self.json_default)
         else:
             record.message = record.getMessage()
 
@@ -87,6 +116,477 @@ class CustomTimeLoggingFormatter(jsonlogger.JsonFormatter):
         log_record.pop("name", "")
         return self.serialize_log_record(log_record)
 
+    def serialize_log_record(self, log_record):
+        """Returns the final representation of the log record."""
+        return self.prefix + json_codec.dumps(log_record, default=self.json_default)
+
+
+class FastLoggingFormatter(CustomTimeLoggingFormatter):
+    """
+    Builds the same records as CustomTimeLoggingFormatter for the format patch_logging uses,
+    without the OrderedDict, add_fields and process_log_record round: the timestamp is
+    formatted once per second, the access request line is parsed once and format_bytes
+    serializes straight to bytes for the LogPipeline. Enabled with LOGGING.FAST_FORMATTER.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(FastLoggingFormatter, self).__init__(*args, **kwargs)
+        self._skip_keys = frozenset(self._skip_fields)
+        # (second, formatted timestamp), replaced as a whole so threads never see half an update
+        self._timestamp_cache = (None, None)
+
+    def format_timestamp(self, created):
+        second = int(created)
+        cached_second, timestamp = self._timestamp_cache
+        if cached_second != second:
+            timestamp = time.strftime(self.datefmt, self.converter(created))
+            self._timestamp_cache = (second, timestamp)
+        return timestamp
+
+    def build_log_record(self, record):
+        if isinstance(record.msg, dict):
+            message = json_codec.dumps(record.msg, default=self.json_default)
+        else:
+            message = record.getMessage()
+        if len(message) > 2000:
+            message = message[:2000] + '.....'
+        record.message = message
+
+        log_record = {
+            "timestamp": self.format_timestamp(record.created),
+            "loglevel": record.levelname,
+            "message": message,
+        }
+        traceback = None
+        if record.exc_info:
+            log_record["exception_type"] = record.exc_info[0].__name__
+            traceback = self.formatException(record.exc_info)
+        elif record.exc_text:
+            traceback = record.exc_text
+        if record.stack_info:
+            log_record["stack_info"] = self.formatStack(record.stack_info)
+
+        skip_keys = self._skip_keys
+        for key, value in record.__dict__.items():
+            if key not in skip_keys and not key.startswith("_"):
+                log_record[key] = value
+
+        request = log_record.get("request")
+        if request:
+            request_line = request.split(" ")
+            url = urlparse(request_line[1])
+            log_record["method"] = request_line[0]
+            log_record["url"] = url.path
+            log_record["params"] = url.query
+
+        log_record["traceback"] = traceback
+        return log_record
+
+    def format(self, record):
+        return self.serialize_log_record(self.build_log_record(record))
+
+    def format_bytes(self, record):
+        return self.prefix.encode() + json_codec.dumps_bytes(self.build_log_record(record), default=self.json_default)
+
+
+class LogPipeline:
+    """
+    Bounded queue of log records drained by a writer thread, which formats them and writes them
+    in batches: all the records taken off the queue in one go are written to a stream with a
+    single write and flush.
+
+    When the queue is full, records are dropped (``drop``), the caller waits for room
+    (``block``), or (``sample``) only ``sample_rate`` of the records below WARNING are queued
+    once the queue is half full and whatever still does not fit is dropped.
+    """
+
+    STOP = object()
+    DROP_REPORT_INTERVAL = 10
+
+    def __init__(self, queue_size=10000, batch_size=256, overflow=LogOverflowPolicy.DROP.value, sample_rate=0.1):
+        self.overflow = LogOverflowPolicy(overflow)
+        self.batch_size = batch_size
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._high_water = queue_size // 2
+        self._reported_drops = 0
+        self._last_drop_report = 0
+        self._thread = threading.Thread(target=self._run, name="torpedo-log-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, record, handlers):
+        item = (record, handlers)
+        if self.overflow == LogOverflowPolicy.BLOCK:
+            self._queue.put(item)
+            return
+        if (
+            self.overflow == LogOverflowPolicy.SAMPLE
+            and record.levelno < logging.WARNING
+            and self._queue.qsize() >= self._high_water
+            and random.random() >= self.sample_rate
+        ):
+            self.sampled_out += 1
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self.STOP in batch
+            self._write([item for item in batch if item is not self.STOP])
+            self._report_drops()
+            if stop:
+                return
+
+    def _write(self, batch):
+        lines = {}
+        for record, handlers in batch:
+            for handler in handlers:
+                if record.levelno < handler.level or not handler.filter(record):
+                    continue
+                # plain streams and files are batched, anything else (rotation, sockets) handles
+                # its records itself
+                if type(handler) not in (logging.StreamHandler, logging.FileHandler):
+                    handler.handle(record)
+                    continue
+                try:
+                    if self._writes_bytes(handler):
+                        line = handler.formatter.format_bytes(record) + handler.terminator.encode()
+                    else:
+                        line = handler.format(record) + handler.terminator
+                    lines.setdefault(handler, []).append(line)
+                except Exception:
+                    handler.handleError(record)
+        for handler, handler_lines in lines.items():
+            handler.acquire()
+            try:
+                if handler.stream is None:
+                    # FileHandler opened with delay=True
+                    handler.stream = handler._open()
+                if isinstance(handler_lines[0], bytes):
+                    # anything written through the text layer goes out first
+                    handler.stream.flush()
+                    handler.stream.buffer.write(b"".join(handler_lines))
+                else:
+                    handler.stream.write("".join(handler_lines))
+                handler.flush()
+            except Exception:
+                handler.handleError(batch[-1][0])
+            finally:
+                handler.release()
+        self.written += len(batch)
+
+    @staticmethod
+    def _writes_bytes(handler):
+        stream = handler.stream
+        return (
+            hasattr(handler.formatter, "format_bytes")
+            and hasattr(stream, "buffer")
+            and (getattr(stream, "encoding", None) or "").lower().replace("-", "") == "utf8"
+        )
+
+    def _report_drops(self):
+        lost = self.dropped + self.sampled_out
+        now = time.monotonic()
+        if lost == self._reported_drops or now - self._last_drop_report < self.DROP_REPORT_INTERVAL:
+            return
+        logging.getLogger(__name__).warning(
+            "Log queue full, {} records dropped or sampled out since the last report".format(lost - self._reported_drops)
+        )
+        self._reported_drops = lost
+        self._last_drop_report = now
+
+    def stop(self, timeout=5):
+        self._queue.put(self.STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+        }
+
+
+EXCEPTION_FORMATTER = logging.Formatter()
+
+
+class QueuedHandler(logging.Handler):
+    """
+    Replaces the handlers of a logger, hands records to the LogPipeline for them
+    """
+
+    def __init__(self, pipeline, handlers):
+        super(QueuedHandler, self).__init__()
+        self.pipeline = pipeline
+        self.handlers = handlers
+
+    def handle(self, record):
+        # no handler lock needed, the queue is thread safe
+        if self.filter(record):
+            self.emit(record)
+            return True
+        return False
+
+    def emit(self, record):
+        self.pipeline.enqueue(self.prepare(record), self.handlers)
+
+    @staticmethod
+    def prepare(record):
+        """
+        Resolve what the writer thread would otherwise read later, like QueueHandler.prepare: the
+        message with its arguments, which the caller may change once the log call returned, and
+        the exception
+        """
+        if isinstance(record.msg, dict):
+            record.msg = json_codec.dumps(record.msg, default=json_log_default)
+        else:
+            record.msg = record.getMessage()
+        record.message = record.msg
+        record.args = None
+        if record.exc_info:
+            record.exception_type = record.exc_info[0].__name__
+            record.exc_text = EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogSampler(logging.Filter):
+    """
+    Thins out logs under load, attached to every handler:
+
+    - access logs are kept up to ``access_per_second`` per second and / or with probability
+      ``access_rate``, server errors and requests slower than ``slow_request_ms`` are always kept
+    - other records repeating the same logger, level and message within ``dedupe_window``
+      seconds are dropped after the first one; the last dropped record is logged again with the
+      count of dropped records as ``suppressed`` once the window is over, by a flusher thread
+      checking every ``dedupe_window`` seconds, unless the next record for that key comes first
+      and carries the count itself
+    """
+
+    MAX_KEYS = 10000
+
+    def __init__(self, access_per_second=None, access_rate=None, slow_request_ms=None, dedupe_window=None):
+        super(LogSampler, self).__init__()
+        self.access_per_second = access_per_second
+        self.access_rate = access_rate
+        self.slow_request_ms = slow_request_ms
+        self.dedupe_window = dedupe_window
+        self.access_sampled_out = 0
+        self.suppressed = 0
+        self._second = None
+        self._access_in_second = 0
+        self._seen = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        if dedupe_window:
+            self._thread = threading.Thread(target=self._run, name="torpedo-log-sampler", daemon=True)
+            self._thread.start()
+
+    def filter(self, record):
+        # a record reaching several handlers is sampled once
+        keep = getattr(record, "_sampled", None)
+        if keep is None:
+            keep = record._sampled = self._sample(record)
+        return keep
+
+    def _sample(self, record):
+        if record.name == ACCESS_LOGGER:
+            return self._sample_access(record)
+        if self.dedupe_window:
+            return self._collapse_repeats(record)
+        return True
+
+    def _sample_access(self, record):
+        if record.levelno >= logging.ERROR or (getattr(record, "status_code", 0) or 0) >= 500:
+            return True
+        response_time = getattr(record, "response_time", None)
+        if self.slow_request_ms is not None and isinstance(response_time, (int, float)) \
+                and response_time >= self.slow_request_ms:
+            return True
+
+        keep = self.access_rate is None or random.random() < self.access_rate
+        if keep and self.access_per_second is not None:
+            second = int(record.created)
+            with self._lock:
+                if second != self._second:
+                    self._second, self._access_in_second = second, 0
+                keep = self._access_in_second < self.access_per_second
+                if keep:
+                    self._access_in_second += 1
+        if not keep:
+            self.access_sampled_out += 1
+        return keep
+
+    def _collapse_repeats(self, record):
+        key = (record.name, record.levelno, record.msg if isinstance(record.msg, str) else repr(record.msg))
+        now = record.created
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.dedupe_window:
+                # [window start, records dropped, last record dropped]
+                seen[1] += 1
+                seen[2] = record
+                self.suppressed += 1
+                return False
+            if seen is not None and seen[1]:
+                record.suppressed = seen[1]
+            elif seen is None and len(self._seen) >= self.MAX_KEYS:
+                self._forget(now)
+            self._seen[key] = [now, 0, None]
+        return True
+
+    def _forget(self, now):
+        self._close_windows(now)
+        if len(self._seen) >= self.MAX_KEYS:
+            self._close_windows(math.inf)
+
+    def _close_windows(self, now):
+        # called with the lock held, the summaries of closed windows are logged by flush
+        open_windows = {}
+        for key, seen in self._seen.items():
+            if now - seen[0] < self.dedupe_window:
+                open_windows[key] = seen
+            elif seen[1]:
+                summary = logging.makeLogRecord(seen[2].__dict__)
+                summary.suppressed = seen[1]
+                summary._sampled = True
+                self._pending.append(summary)
+        self._seen = open_windows
+
+    def flush(self, now=None):
+        """
+        Log the summary of every window that is over and had records dropped
+        """
+        with self._lock:
+            self._close_windows(time.time() if now is None else now)
+            pending, self._pending = self._pending, []
+        for summary in pending:
+            logging.getLogger(summary.name).handle(summary)
+
+    def _run(self):
+        while not self._stopped.wait(self.dedupe_window):
+            try:
+                self.flush()
+            except Exception:
+                # a broken handler must not stop the flusher
+                pass
+
+    def stop(self):
+        """
+        Stop the flusher and log the summaries of all windows, including the running ones
+        """
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+        if self.dedupe_window:
+            self.flush(math.inf)
+
+    def stats(self):
+        return {"access_sampled_out": self.access_sampled_out, "suppressed": self.suppressed}
+
+
+def _configured_loggers():
+    return [logging.getLogger()] + [
+        _logger for _logger in logging.Logger.manager.loggerDict.values() if isinstance(_logger, logging.Logger)
+    ]
+
+
+LOG_PIPELINE = None
+LOG_SAMPLER = None
+
+
+def start_log_pipeline(config):
+    """
+    Move the handlers of every configured logger behind a LogPipeline when LOGGING.ASYNC is set
+    in config.json. Called per worker process once Sanic configured its loggers.
+    """
+    global LOG_PIPELINE
+    async_config = (config.get("LOGGING") or {}).get("ASYNC")
+    if not async_config or LOG_PIPELINE is not None:
+        return
+    if async_config is True:
+        async_config = {}
+    LOG_PIPELINE = LogPipeline(
+        queue_size=async_config.get("QUEUE_SIZE", 10000),
+        batch_size=async_config.get("BATCH_SIZE", 256),
+        overflow=async_config.get("OVERFLOW", LogOverflowPolicy.DROP.value),
+        sample_rate=async_config.get("SAMPLE_RATE", 0.1),
+    )
+    for _logger in _configured_loggers():
+        if _logger.handlers:
+            _logger.handlers = [QueuedHandler(LOG_PIPELINE, list(_logger.handlers))]
+
+
+def stop_log_pipeline():
+    """
+    Put the original handlers back and write out what is still queued
+    """
+    global LOG_PIPELINE
+    if LOG_PIPELINE is None:
+        return
+    pipeline, LOG_PIPELINE = LOG_PIPELINE, None
+    for _logger in _configured_loggers():
+        handlers = _logger.handlers
+        if handlers and isinstance(handlers[0], QueuedHandler):
+            _logger.handlers = handlers[0].handlers
+    pipeline.stop()
+
+
+def get_log_pipeline_stats():
+    return LOG_PIPELINE.stats() if LOG_PIPELINE is not None else None
+
+
+def start_log_sampling(config):
+    """
+    Attach a LogSampler to the handlers of every configured logger when LOGGING.SAMPLING is set
+    in config.json. Runs after start_log_pipeline so that records are sampled before they are
+    queued.
+    """
+    global LOG_SAMPLER
+    sampling_config = (config.get("LOGGING") or {}).get("SAMPLING")
+    if not sampling_config or LOG_SAMPLER is not None:
+        return
+    LOG_SAMPLER = LogSampler(
+        access_per_second=sampling_config.get("ACCESS_PER_SECOND"),
+        access_rate=sampling_config.get("ACCESS_RATE"),
+        slow_request_ms=sampling_config.get("SLOW_REQUEST_MS"),
+        dedupe_window=sampling_config.get("DEDUPE_WINDOW"),
+    )
+    for _logger in _configured_loggers():
+        for handler in _logger.handlers:
+            handler.addFilter(LOG_SAMPLER)
+
+
+def stop_log_sampling():
+    global LOG_SAMPLER
+    if LOG_SAMPLER is None:
+        return
+    LOG_SAMPLER.stop()
+    for _logger in _configured_loggers():
+        for handler in _logger.handlers:
+            handler.removeFilter(LOG_SAMPLER)
+    LOG_SAMPLER = None
+
+
+def get_log_sampling_stats():
+    return LOG_SAMPLER.stats() if LOG_SAMPLER is not None else None
+
 
 def patch_logging(config):
 
@@ -103,6 +603,9 @@ def patch_logging(config):
         return
 
     log_message_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    formatter_class = CustomTimeLoggingFormatter
+    if (config.get("LOGGING") or {}).get("FAST_FORMATTER"):
+        formatter_class = FastLoggingFormatter
 
     ################################
     # Set propagate=False for Sanic loggers
@@ -119,14 +622,12 @@ def patch_logging(config):
     def record_factory(*args, **kwargs):
         record = old_factory(*args, **kwargs)
 
-        try:
-            record.request_id = context.get('X-REQUEST-ID')
-        except Exception as e:
-            record.request_id = '-'
+        # outside a request, possibly a function offloaded to a pool on behalf of a request
+        record.request_id = context.get('X-REQUEST-ID') or get_offloaded_request_id() or '-'
 
         # define logtype
         logger_name = record.name
-        if logger_name == 'sanic.access':
+        if logger_name == ACCESS_LOGGER:
             record.logtype = LogType.ACCESS_LOG.value
         elif logger_name == 'aiohttp.external':
             record.logtype = LogType.EXTERNAL_CALL_LOG.value
@@ -138,7 +639,7 @@ def patch_logging(config):
         record.service_name = ServiceAttribute.name
         record.branchname = ServiceAttribute.branch_name
         record.current_tag = ServiceAttribute.current_tag
-        record.host = '{}:{}'.format(ServiceAttribute.host, ServiceAttribute.port)
+        record.host = ServiceAttribute.address
 
         # TODO put a check on length of record.message. If the length/size is more than the specified limit, truncate the message
 
@@ -176,7 +677,7 @@ def patch_logging(config):
             extra['user_agent'] = context.get("X-USER-AGENT")
             extra['response_time'] = context.get("response_time")
 
-        logging.getLogger('sanic.access').info("", extra=extra)
+        logging.getLogger(ACCESS_LOGGER).info("", extra=extra)
 
     Http.log_response = log_response_custom
 
@@ -184,7 +685,7 @@ def patch_logging(config):
     # Patch lastResort handler of the logging module - this is used a default handler for loggers with no handlers
     ################################
 
-    fmt = CustomTimeLoggingFormatter(log_message_format)
+    fmt = formatter_class(log_message_format)
     logging.lastResort.setFormatter(fmt)
 
     ################################
@@ -201,7 +702,7 @@ def patch_logging(config):
         from logging import _acquireLock, weakref, _removeHandlerRef, _handlerList, _releaseLock
         _acquireLock()
         try:
-            fmt = CustomTimeLoggingFormatter(log_message_format)
+            fmt = formatter_class(log_message_format)
             handler.setFormatter(fmt)
             _handlerList.append(weakref.ref(handler, _removeHandlerRef))
         finally:
@@ -229,6 +730,6 @@ def patch_logging(config):
     ################################
     for weak_ref_handler in logging._handlerList:
         handler= weak_ref_handler()
-        fmt = CustomTimeLoggingFormatter(log_message_format)
+        fmt = formatter_class(log_message_format)
         handler.setFormatter(fmt)
 
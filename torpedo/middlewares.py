@@ -1,9 +1,18 @@
 import uuid
 import time
-import aiotask_context as context
 
+from . import request_context as context
+from .common_utils import CONFIG
 from .constants import X_REQUEST_ID, X_VISITOR_ID, X_SOURCE_IP, X_SOURCE_USER_AGENT, X_SOURCE_REFERER, \
-    GLOBAL_HEADERS, X_USER_AGENT
+    X_REQUEST_DEADLINE, X_SHARED_CONTEXT, MiddlewareStage
+from .deadline import parse_deadline_header, set_request_deadline
+
+SKIP_STAGES_ATTRIBUTE = "torpedo_skip_stages"
+NO_STAGES = frozenset()
+REQUEST_ID_STAGE = MiddlewareStage.REQUEST_ID.value
+TIMING_STAGE = MiddlewareStage.TIMING.value
+DEADLINE_STAGE = MiddlewareStage.DEADLINE.value
+GLOBAL_HEADERS_STAGE = MiddlewareStage.GLOBAL_HEADERS.value
 
 
 def get_request_id_from_request(request):
@@ -11,26 +20,110 @@ def get_request_id_from_request(request):
 
 
 async def handle_request_id(request):
-    context.set(
-        X_REQUEST_ID, get_request_id_from_request(request)
-    )
-    context.set(X_USER_AGENT, request.headers.get("user-agent"))
+    request_context = context.begin()
+    request_context.request_id = get_request_id_from_request(request)
+    request_context.user_agent = request.headers.get("user-agent")
+    # parsed on first use only, see RequestContext.shared_context
+    request_context.shared_context_header = request.headers.get(X_SHARED_CONTEXT)
 
 
 async def add_start_time(request):
-    context.set('request_start_time', int(time.time()*1000))
+    context.ensure().start_time = int(time.time()*1000)
 
 
 async def add_response_time(request, response):
-    context.set('response_time', int(time.time() * 1000) - context.get('request_start_time'))
+    request_context = context.ensure()
+    request_context.response_time = int(time.time() * 1000) - request_context.start_time
 
 
 async def global_headers_middleware_factory(request):
     global_headers = {
-        X_REQUEST_ID: get_request_id_from_request(request),
+        # reuse the id handle_request_id settled on, a missing header must not yield two uuids
+        X_REQUEST_ID: context.get(X_REQUEST_ID) or get_request_id_from_request(request),
         X_VISITOR_ID: request.headers.get(X_VISITOR_ID, ''),
         X_SOURCE_IP: request.headers.get(X_SOURCE_IP, ''),
         X_SOURCE_USER_AGENT: request.headers.get(X_SOURCE_USER_AGENT, ''),
         X_SOURCE_REFERER: request.headers.get(X_SOURCE_REFERER, '')
     }
-    context.set(GLOBAL_HEADERS, global_headers)
+    context.ensure().global_headers = global_headers
+
+
+def get_route_deadline(request):
+    """
+    Default budget in seconds for a route, from config.json:
+    "REQUEST_DEADLINE": {"DEFAULT": 1000, "ROUTES": {"/v4/hello": 500}} (milliseconds)
+    """
+    deadline_config = (CONFIG.config or {}).get("REQUEST_DEADLINE") or {}
+    routes = deadline_config.get("ROUTES") or {}
+    budget = routes.get(request.path)
+    if budget is None and request.route:
+        budget = routes.get(request.uri_template)
+    if budget is None:
+        budget = deadline_config.get("DEFAULT")
+    return budget / 1000 if budget else None
+
+
+def apply_request_deadline(request):
+    budgets = [
+        budget for budget in (parse_deadline_header(request.headers.get(X_REQUEST_DEADLINE)),
+                              get_route_deadline(request))
+        if budget is not None
+    ]
+    if budgets:
+        set_request_deadline(min(budgets))
+
+
+async def add_request_deadline(request):
+    apply_request_deadline(request)
+
+
+def skip_middleware_stages(*stages):
+    """
+    Opt a route handler out of stages of torpedo_request_middleware
+
+        @skip_middleware_stages(MiddlewareStage.DEADLINE, MiddlewareStage.GLOBAL_HEADERS)
+        async def ping(request): ...
+    """
+    skipped = frozenset(MiddlewareStage(stage).value for stage in stages)
+
+    def decorator(handler):
+        setattr(handler, SKIP_STAGES_ATTRIBUTE, skipped)
+        return handler
+
+    return decorator
+
+
+async def torpedo_request_middleware(request):
+    """
+    Does the work of handle_request_id, add_start_time, add_request_deadline and
+    global_headers_middleware_factory in a single middleware, reading every header once.
+    Stages a route opted out of with skip_middleware_stages are left out.
+    """
+    headers = request.headers
+    route = request.route
+    skipped = getattr(route.handler, SKIP_STAGES_ATTRIBUTE, NO_STAGES) if route is not None else NO_STAGES
+    request_context = context.begin()
+
+    request_id = None
+    if REQUEST_ID_STAGE not in skipped:
+        request_id = request_context.request_id = headers.get(X_REQUEST_ID) or str(uuid.uuid4())
+        request_context.user_agent = headers.get("user-agent")
+        request_context.shared_context_header = headers.get(X_SHARED_CONTEXT)
+    if TIMING_STAGE not in skipped:
+        request_context.start_time = int(time.time()*1000)
+    if DEADLINE_STAGE not in skipped:
+        apply_request_deadline(request)
+    if GLOBAL_HEADERS_STAGE not in skipped:
+        request_context.global_headers = {
+            X_REQUEST_ID: request_id or headers.get(X_REQUEST_ID) or str(uuid.uuid4()),
+            X_VISITOR_ID: headers.get(X_VISITOR_ID, ''),
+            X_SOURCE_IP: headers.get(X_SOURCE_IP, ''),
+            X_SOURCE_USER_AGENT: headers.get(X_SOURCE_USER_AGENT, ''),
+            X_SOURCE_REFERER: headers.get(X_SOURCE_REFERER, '')
+        }
+
+
+async def torpedo_response_middleware(request, response):
+    request_context = context.current()
+    if request_context is not None and request_context.start_time is not None:
+        request_context.response_time = int(time.time() * 1000) - request_context.start_time
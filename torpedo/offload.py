@@ -0,0 +1,96 @@
+import asyncio
+import contextvars
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from sanic.log import logger
+
+from . import request_context as context
+from .common_utils import CONFIG
+from .constants import X_REQUEST_ID
+
+# request id of the request a function was offloaded for, read by the log record factory in
+# pool threads and processes where there is no request task
+OFFLOADED_REQUEST_ID = contextvars.ContextVar("offloaded_request_id", default=None)
+
+
+def get_offloaded_request_id():
+    return OFFLOADED_REQUEST_ID.get()
+
+
+def _call_with_request_id(request_id, func, args, kwargs):
+    # module level so that it can be pickled for the process pool
+    token = OFFLOADED_REQUEST_ID.set(request_id)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # pool threads are reused, never leak the id into the next call
+        OFFLOADED_REQUEST_ID.reset(token)
+
+
+class Offloader:
+    """
+    Runs blocking and CPU bound functions off the event loop, in a thread pool or a process pool
+    owned by the worker. Host opens the pools when the server starts and shuts them down when it
+    stops, sizes are read from config.json::
+
+        "OFFLOAD": {
+            "THREAD_POOL_SIZE": 8,
+            "PROCESS_POOL_SIZE": 2
+        }
+
+    CPU bound functions and their arguments are pickled into another process, so they have to be
+    module level functions (or functools.partial of one) taking plain data. Sanic workers run as
+    daemonic processes when WORKERS > 1 and may not fork children, CPU bound calls fall back to
+    the thread pool there. Cancelling the awaiting task does not interrupt a call already running.
+    """
+
+    _thread_pool = None
+    _process_pool = None
+    _process_pool_unavailable = False
+
+    @classmethod
+    def get_config(cls):
+        return (CONFIG.config or {}).get("OFFLOAD") or {}
+
+    @classmethod
+    def get_thread_pool(cls):
+        if cls._thread_pool is None:
+            cls._thread_pool = ThreadPoolExecutor(
+                max_workers=cls.get_config().get("THREAD_POOL_SIZE"), thread_name_prefix="torpedo-offload"
+            )
+        return cls._thread_pool
+
+    @classmethod
+    def get_process_pool(cls):
+        if cls._process_pool is None and not cls._process_pool_unavailable:
+            if multiprocessing.current_process().daemon:
+                cls._process_pool_unavailable = True
+                logger.warning("Daemonic worker process can not start a process pool, CPU bound calls use threads")
+            else:
+                cls._process_pool = ProcessPoolExecutor(max_workers=cls.get_config().get("PROCESS_POOL_SIZE"))
+        return cls._process_pool
+
+    @classmethod
+    async def run(cls, func, *args, cpu_bound=False, **kwargs):
+        """
+        :param cpu_bound: run in the process pool instead of the thread pool
+        :return: result of func(*args, **kwargs)
+        """
+        pool = (cpu_bound and cls.get_process_pool()) or cls.get_thread_pool()
+        request_id = context.get(X_REQUEST_ID)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(pool, _call_with_request_id, request_id, func, args, kwargs)
+
+    @classmethod
+    async def open(cls):
+        cls.get_thread_pool()
+
+    @classmethod
+    async def close(cls):
+        for name, pool in (("thread", cls._thread_pool), ("process", cls._process_pool)):
+            if pool is not None:
+                pool.shutdown(wait=True)
+                logger.info("Closed offload {} pool".format(name))
+        cls._thread_pool = None
+        cls._process_pool = None
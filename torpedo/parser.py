@@ -1,8 +1,77 @@
+import re
+
 from sanic.log import error_logger
 
+from . import json_codec
 from .exceptions import HTTPInterServiceRequestException
 from .task import AsyncTaskResponse
 
+ENVELOPE_DATA_PREFIX = re.compile(rb'\s*{\s*"data"\s*:')
+ENVELOPE_SUCCESS_KEY = b'"is_success"'
+ENVELOPE_MAX_ATTEMPTS = 3
+ENVELOPE_REQUIRED_KEYS = ("is_success", "status_code")
+# strings as a whole, so that brackets and commas inside them are skipped, and structural characters
+JSON_STRUCTURE = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{},]')
+
+
+def is_single_json_value(raw: bytes):
+    """
+    Structural check that raw holds one JSON value and nothing after it: brackets balance and
+    there is no comma outside of them. The value itself is only validated when decoded.
+    """
+    if not raw:
+        return False
+    depth = 0
+    for token in JSON_STRUCTURE.finditer(raw):
+        char = token.group()[0]
+        if char in b"[{":
+            depth += 1
+        elif char in b"]}":
+            depth -= 1
+            if depth < 0:
+                return False
+        elif char == 44 and depth == 0:
+            # "," at the top level, raw is data followed by other envelope keys
+            return False
+    return depth == 0
+
+
+def split_api_envelope(body: bytes):
+    """
+    Split a torpedo response body ({"data": ..., "is_success": ..., "status_code": ...[, "meta": ...]})
+    into the raw bytes of ``data`` and the decoded rest of the envelope, without decoding ``data``.
+
+    The rest of the envelope is taken from the last "is_success" key and decoded on its own; it
+    only parses if that key sits at the top level, so a nested "is_success" can not produce a
+    wrong split, it is skipped instead. The split is only used when that rest holds both
+    "is_success" and "status_code" and the bytes before it are exactly one JSON value, keys in
+    any other order ("meta" or "status_code" ahead of "is_success", ...) need a full decode.
+    :return: (data bytes, envelope dict) or None when the body does not have that layout
+    """
+    prefix = ENVELOPE_DATA_PREFIX.match(body)
+    if prefix is None:
+        return None
+    key = len(body)
+    # a nested "is_success" can only come after the top level one inside "meta", give up after a few
+    for _ in range(ENVELOPE_MAX_ATTEMPTS):
+        key = body.rfind(ENVELOPE_SUCCESS_KEY, prefix.end(), key)
+        if key == -1:
+            return None
+        comma = body.rfind(b",", prefix.end(), key)
+        if comma == -1 or body[comma + 1:key].strip():
+            continue
+        try:
+            envelope = json_codec.loads(b"{" + body[comma + 1:])
+        except ValueError:
+            continue
+        if not isinstance(envelope, dict) or not all(key in envelope for key in ENVELOPE_REQUIRED_KEYS):
+            continue
+        data = body[prefix.end():comma].strip()
+        if not is_single_json_value(data):
+            return None
+        return data, envelope
+    return None
+
 
 class BaseHttpResponseParser:
 
@@ -12,6 +81,13 @@ class BaseHttpResponseParser:
         self._headers = headers
         self._response_headers_list = response_headers_list
 
+    @classmethod
+    def lazy_load(cls, body: bytes):
+        """
+        Payload handed to the parser when the client decodes lazily, see BaseHttpRequest._lazy_decode
+        """
+        return json_codec.RawJson(body)
+
     def parse(self) -> AsyncTaskResponse:
         headers = self._prepare_headers()
         return AsyncTaskResponse(
@@ -38,6 +114,15 @@ class BaseApiResponseParser(BaseHttpResponseParser):
         self._headers = headers
         self._response_headers_list = response_headers_list
 
+    @classmethod
+    def lazy_load(cls, body: bytes):
+        envelope = split_api_envelope(body)
+        if envelope is None:
+            return json_codec.loads(body)
+        data, envelope = envelope
+        envelope["data"] = json_codec.RawJson(data)
+        return envelope
+
     def parse(self):
         if self._data["is_success"]:
             headers = self._prepare_headers()
@@ -0,0 +1,132 @@
+"""
+Request scoped state on top of contextvars.
+
+The first request middleware starts a fresh RequestContext per request with ``begin``; tasks
+created while handling the request (TaskExecutor, gather, ...) see the same object, so a value
+set in one of them is visible to the whole request, as it was with the aiotask_context task
+factory. Outside of a request ``get`` returns the default and ``set`` starts a context for the
+current task.
+"""
+from contextvars import ContextVar
+from types import MappingProxyType
+
+from . import json_codec
+from .constants import (CONTENT_TYPE, GLOBAL_HEADERS, REQUEST_DEADLINE, X_REQUEST_ID, X_SERVICE_NAME,
+                        X_SERVICE_VERSION, X_USER_AGENT)
+
+REQUEST_CONTEXT = ContextVar("torpedo_request_context", default=None)
+
+# keys of the get / set API kept in RequestContext attributes, any other key goes to ``values``
+ATTRIBUTE_KEYS = {
+    X_REQUEST_ID: "request_id",
+    X_USER_AGENT: "user_agent",
+    "request_start_time": "start_time",
+    "response_time": "response_time",
+    REQUEST_DEADLINE: "deadline",
+    GLOBAL_HEADERS: "global_headers",
+}
+
+_UNSET = object()
+
+
+class RequestContext:
+    """
+    State of one request, filled once by torpedo's request middlewares. The X-SHARED-CONTEXT
+    header is only parsed when the shared context or the user is asked for, and the headers
+    BaseApiRequest sends upstream are built once per request.
+    """
+
+    __slots__ = (
+        "request_id", "user_agent", "start_time", "response_time", "deadline", "shared_context_header",
+        "values", "_global_headers", "_shared_context", "_outbound_headers",
+    )
+
+    def __init__(self):
+        self.request_id = None
+        self.user_agent = None
+        self.start_time = None
+        self.response_time = None
+        self.deadline = None
+        self.shared_context_header = None
+        self.values = {}
+        self._global_headers = None
+        self._shared_context = _UNSET
+        self._outbound_headers = None
+
+    @property
+    def global_headers(self):
+        return self._global_headers
+
+    @global_headers.setter
+    def global_headers(self, headers):
+        self._global_headers = headers
+        self._outbound_headers = None
+
+    @property
+    def shared_context(self):
+        if self._shared_context is _UNSET:
+            header = self.shared_context_header
+            self._shared_context = json_codec.loads(header) if header else None
+        return self._shared_context
+
+    @property
+    def user(self):
+        shared_context = self.shared_context
+        if isinstance(shared_context, dict):
+            return shared_context.get("user_context")
+        return None
+
+    def outbound_headers(self, service_name, service_version):
+        """
+        :return: read only global headers plus the calling service's name and version
+        """
+        cached = self._outbound_headers
+        if cached is None or cached[0] != (service_name, service_version):
+            cached = self._outbound_headers = (
+                (service_name, service_version),
+                build_outbound_headers(self._global_headers, service_name, service_version),
+            )
+        return cached[1]
+
+
+def build_outbound_headers(global_headers, service_name, service_version):
+    headers = dict(global_headers or {})
+    headers[X_SERVICE_NAME] = service_name
+    headers[X_SERVICE_VERSION] = service_version
+    headers[CONTENT_TYPE] = "application/json"
+    return MappingProxyType(headers)
+
+
+def begin():
+    # Sanic serves all requests of a keep-alive connection from one task, never carry values over
+    request_context = RequestContext()
+    REQUEST_CONTEXT.set(request_context)
+    return request_context
+
+
+def current():
+    return REQUEST_CONTEXT.get()
+
+
+def ensure():
+    return REQUEST_CONTEXT.get() or begin()
+
+
+def get(key, default=None):
+    request_context = REQUEST_CONTEXT.get()
+    if request_context is None:
+        return default
+    attribute = ATTRIBUTE_KEYS.get(key)
+    if attribute is None:
+        return request_context.values.get(key, default)
+    value = getattr(request_context, attribute)
+    return default if value is None else value
+
+
+def set(key, value):
+    request_context = ensure()
+    attribute = ATTRIBUTE_KEYS.get(key)
+    if attribute is None:
+        request_context.values[key] = value
+    else:
+        setattr(request_context, attribute, value)
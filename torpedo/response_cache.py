@@ -0,0 +1,169 @@
+import time
+from collections import OrderedDict
+
+from .constants import (AUTHORIZATION, CACHE_CONTROL, COOKIE, ETAG, LAST_MODIFIED, VARY, IF_NONE_MATCH,
+                        IF_MODIFIED_SINCE, X_SHARED_CONTEXT)
+
+
+def parse_cache_control(value):
+    """
+    Parse a Cache-Control header into a dict of lower cased directives
+    :param value: raw header value
+    :return: {'max-age': '30', 'no-store': None, ...}
+    """
+    directives = {}
+    if not value:
+        return directives
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        key, _, arg = part.partition("=")
+        directives[key.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+class CachedResponse:
+    def __init__(self, status_code, headers, body, expires_at):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+
+    @property
+    def etag(self):
+        return self.headers.get(ETAG)
+
+    @property
+    def last_modified(self):
+        return self.headers.get(LAST_MODIFIED)
+
+    def is_fresh(self, now=None):
+        return (now or time.monotonic()) < self.expires_at
+
+    def can_revalidate(self):
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers[IF_NONE_MATCH] = self.etag
+        if self.last_modified:
+            headers[IF_MODIFIED_SINCE] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Bounded in-process LRU cache for upstream GET responses.
+
+    Entries are kept for the upstream ``max-age`` capped at ``ttl`` seconds. Stale entries carrying
+    an ETag / Last-Modified validator are kept around so the next call can revalidate them with a
+    conditional request instead of downloading the body again.
+
+    The cache is shared by every request served by the worker, so responses marked ``private``,
+    ``no-store`` or varying on request headers are never stored, and requests carrying the
+    caller's credentials or user context (``PRIVATE_REQUEST_HEADERS``) bypass the cache.
+    """
+
+    CACHEABLE_STATUS_CODES = {200, 203}
+    PRIVATE_REQUEST_HEADERS = frozenset(header.lower() for header in (AUTHORIZATION, COOKIE, X_SHARED_CONTEXT))
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    @classmethod
+    def is_private_request(cls, headers):
+        """
+        A shared cache must not answer or store requests made on behalf of a user, RFC 9111 3.5
+        """
+        return any(header.lower() in cls.PRIVATE_REQUEST_HEADERS for header in headers or ())
+
+    @staticmethod
+    def build_key(method, url):
+        return "{} {}".format(method.upper(), url)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def record_hit(self):
+        self.hits += 1
+
+    def record_miss(self):
+        self.misses += 1
+
+    def record_revalidation(self):
+        self.revalidations += 1
+
+    def get_ttl(self, headers):
+        directives = parse_cache_control(headers.get(CACHE_CONTROL))
+        if "no-store" in directives or "private" in directives:
+            return None
+        vary = {v.strip().lower() for v in (headers.get(VARY) or "").split(",") if v.strip()}
+        if vary - {"accept-encoding"}:
+            return None
+        if "no-cache" in directives:
+            return 0
+        max_age = directives.get("s-maxage") or directives.get("max-age")
+        if max_age is not None:
+            try:
+                return max(0, min(int(max_age), self._ttl))
+            except ValueError:
+                return 0
+        return self._ttl
+
+    def store(self, key, status_code, headers, body):
+        if status_code not in self.CACHEABLE_STATUS_CODES:
+            self._entries.pop(key, None)
+            return None
+        ttl = self.get_ttl(headers)
+        if ttl is None:
+            self._entries.pop(key, None)
+            return None
+        entry = CachedResponse(status_code, headers, body, time.monotonic() + ttl)
+        if not ttl and not entry.can_revalidate():
+            self._entries.pop(key, None)
+            return None
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def refresh(self, key, entry, headers):
+        """
+        Extend a stale entry after the upstream answered 304 Not Modified
+        """
+        ttl = self.get_ttl(headers)
+        if ttl is None:
+            self._entries.pop(key, None)
+            return entry
+        entry.expires_at = time.monotonic() + ttl
+        return entry
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+        }
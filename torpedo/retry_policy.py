@@ -0,0 +1,102 @@
+import random
+import time
+
+from aiohttp import ClientError
+
+from .constants import HTTPMethod
+from .exceptions import HTTPRequestTimeoutException
+
+IDEMPOTENT_METHODS = frozenset({HTTPMethod.GET.value, HTTPMethod.PUT.value, HTTPMethod.DELETE.value})
+
+
+class RetryBudget:
+    """
+    Token bucket bounding how many retries a client may issue. Every original request deposits
+    ``ratio`` tokens and the bucket also refills at ``min_retries_per_second``; every retry
+    withdraws a whole token. During an outage the bucket drains and further failures are
+    returned to the caller straight away instead of multiplying the load on the upstream.
+    """
+
+    def __init__(self, ratio=0.2, min_retries_per_second=10, capacity=100):
+        self._ratio = ratio
+        self._min_retries_per_second = min_retries_per_second
+        self._capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self.exhausted = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._min_retries_per_second)
+        self._last_refill = now
+
+    def deposit(self):
+        self._tokens = min(self._capacity, self._tokens + self._ratio)
+
+    def withdraw(self):
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+    def stats(self):
+        self._refill()
+        return {"tokens": round(self._tokens, 2), "capacity": self._capacity, "exhausted": self.exhausted}
+
+
+class RetryPolicy:
+    """
+    Declarative retry policy for inter service calls, set on a client class as ``_retry_policy``
+    or passed per call as ``retry_policy``.
+
+    Only idempotent methods are retried, on connection errors, timeouts (``retry_on_timeout``) and
+    the configured status codes. Attempt n sleeps a random duration between 0 and
+    min(max_delay, base_delay * 2 ** (n - 1)) ("full jitter") before going out again.
+    """
+
+    def __init__(
+        self,
+        max_attempts=3,
+        base_delay=0.05,
+        max_delay=1.0,
+        retry_on_status=(502, 503, 504),
+        retry_on_timeout=True,
+        methods=IDEMPOTENT_METHODS,
+        budget=None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on_status = frozenset(retry_on_status)
+        self.retry_on_timeout = retry_on_timeout
+        self.methods = frozenset(method.lower() for method in methods)
+        self.budget = budget or RetryBudget()
+        self.retries = 0
+
+    def is_retryable_method(self, method):
+        return method.lower() in self.methods
+
+    def should_retry_status(self, status_code):
+        return status_code in self.retry_on_status
+
+    def should_retry_exception(self, exception):
+        if isinstance(exception, HTTPRequestTimeoutException):
+            return self.retry_on_timeout
+        return isinstance(exception, ClientError)
+
+    def on_request(self):
+        self.budget.deposit()
+
+    def can_retry(self, attempt):
+        if attempt >= self.max_attempts or not self.budget.withdraw():
+            return False
+        self.retries += 1
+        return True
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def stats(self):
+        return {"retries": self.retries, "budget": self.budget.stats()}
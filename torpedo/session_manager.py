@@ -0,0 +1,106 @@
+import asyncio
+import weakref
+
+from aiohttp import ClientSession, TCPConnector, UnixConnector
+from sanic.log import logger
+
+from .common_utils import CONFIG
+
+DEFAULT_POOL = "default"
+UNIX_POOL_PREFIX = "unix:"
+
+
+class SessionManager:
+    """
+    Owns the aiohttp ClientSessions used for inter service calls.
+
+    Sessions are created per event loop, so tests and multi loop setups never share a session
+    bound to another loop, and per pool. Besides the default pool, a pool is created for every
+    upstream host listed under ``HTTP_CLIENT.HOSTS`` and for every client class declaring
+    ``_session_pool``. Connector settings are read from config.json::
+
+        "HTTP_CLIENT": {
+            "LIMIT": 100,
+            "LIMIT_PER_HOST": 0,
+            "KEEPALIVE_TIMEOUT": 15,
+            "DNS_CACHE_TTL": 10,
+            "FORCE_CLOSE": false,
+            "HOSTS": {"catalog.internal": {"LIMIT_PER_HOST": 50}},
+            "POOLS": {"search": {"LIMIT": 20, "KEEPALIVE_TIMEOUT": 60}}
+        }
+
+    The legacy CONCURRENCY_LIMIT / CONCURRENCY_LIMIT_HOST keys still provide the defaults.
+    Clients whose ``_host`` is a ``unix://`` socket path get a pool of their own, connected
+    through an aiohttp UnixConnector.
+    """
+
+    _sessions = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_config(cls):
+        return (CONFIG.config or {}).get("HTTP_CLIENT") or {}
+
+    @classmethod
+    def get_pool_settings(cls, pool):
+        config = CONFIG.config or {}
+        http_client_config = cls.get_config()
+        settings = {
+            "LIMIT": config.get("CONCURRENCY_LIMIT") or 0,
+            "LIMIT_PER_HOST": config.get("CONCURRENCY_LIMIT_HOST") or 0,
+            "KEEPALIVE_TIMEOUT": 15,
+            "DNS_CACHE_TTL": 10,
+            "FORCE_CLOSE": False,
+        }
+        settings.update({key: value for key, value in http_client_config.items() if key in settings})
+        if pool != DEFAULT_POOL and not pool.startswith(UNIX_POOL_PREFIX):
+            overrides = http_client_config.get("POOLS", {}).get(pool) or http_client_config.get("HOSTS", {}).get(pool)
+            settings.update(overrides or {})
+        return settings
+
+    @classmethod
+    def resolve_pool(cls, client_pool=None, host=None, unix_socket=None):
+        if unix_socket:
+            return UNIX_POOL_PREFIX + unix_socket
+        if client_pool:
+            return client_pool
+        if host and host in cls.get_config().get("HOSTS", {}):
+            return host
+        return DEFAULT_POOL
+
+    @classmethod
+    def build_connector(cls, pool):
+        settings = cls.get_pool_settings(pool)
+        connector_params = {
+            "limit": settings["LIMIT"] or 0,
+            "limit_per_host": settings["LIMIT_PER_HOST"] or 0,
+            "ttl_dns_cache": settings["DNS_CACHE_TTL"],
+            "force_close": bool(settings["FORCE_CLOSE"]),
+        }
+        # aiohttp refuses a keepalive timeout on connectors that close every connection
+        if not connector_params["force_close"]:
+            connector_params["keepalive_timeout"] = settings["KEEPALIVE_TIMEOUT"]
+        if pool.startswith(UNIX_POOL_PREFIX):
+            connector_params.pop("ttl_dns_cache")
+            return UnixConnector(path=pool[len(UNIX_POOL_PREFIX):], **connector_params)
+        return TCPConnector(**connector_params)
+
+    @classmethod
+    def get_session(cls, pool=DEFAULT_POOL):
+        loop = asyncio.get_event_loop()
+        sessions = cls._sessions.setdefault(loop, {})
+        session = sessions.get(pool)
+        if session is None or session.closed:
+            session = sessions[pool] = ClientSession(connector=cls.build_connector(pool))
+        return session
+
+    @classmethod
+    async def open(cls):
+        cls.get_session(DEFAULT_POOL)
+
+    @classmethod
+    async def close(cls):
+        sessions = cls._sessions.pop(asyncio.get_event_loop(), {})
+        for pool, session in sessions.items():
+            if not session.closed:
+                await session.close()
+                logger.info("Closed inter service http session for pool {}".format(pool))
@@ -1,4 +1,4 @@
-import aiotask_context as context
+from . import request_context as context
 
 
 class SharedContext:
@@ -0,0 +1,52 @@
+import asyncio
+
+from .constants import IF_MODIFIED_SINCE, IF_NONE_MATCH
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls so that only one of them (the leader) does the work.
+
+    The leader's coroutine runs as its own task and every caller, leader included, awaits it
+    through ``asyncio.shield``; a caller being cancelled therefore never cancels the shared work
+    for the others. The key is forgotten as soon as the work completes, so nothing is cached.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def build_key(method, url, data=None, headers=None):
+        # bodies we can not compare cheaply (multipart forms, streams) are never coalesced
+        if data is not None and not isinstance(data, (str, bytes)):
+            return None
+        # a conditional request may get a bare 304, only callers holding the same validators share it
+        validators = (headers.get(IF_NONE_MATCH), headers.get(IF_MODIFIED_SINCE)) if headers else (None, None)
+        return method.upper(), str(url), data, validators
+
+    async def do(self, key, coro_func):
+        task = self._in_flight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(coro_func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _task: self._forget(key, _task))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # the exception is re-raised to every waiter, mark it retrieved for the last one standing
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,85 @@
+import asyncio
+
+from aiohttp import ClientError
+
+from . import json_codec as json
+from .constants import (CACHE_CONTROL, CONTENT_DISPOSITION, CONTENT_ENCODING, CONTENT_LENGTH, CONTENT_TYPE, ETAG,
+                        LAST_MODIFIED)
+from .exceptions import HTTPRequestException, HTTPRequestTimeoutException
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# upstream headers handed on to the client by BaseHttpRequest.proxy
+PROXY_HEADERS = (CONTENT_TYPE, CONTENT_LENGTH, CONTENT_DISPOSITION, CACHE_CONTROL, ETAG, LAST_MODIFIED)
+
+
+class StreamedResponse:
+    """
+    Upstream response whose body is consumed incrementally, handed out by
+    ``BaseHttpRequest.stream``. Only one of the iterators should be used per response; read
+    timeouts and transport errors raised while iterating are mapped to torpedo's
+    HTTPRequestTimeoutException / HTTPRequestException like in ``BaseHttpRequest.request``.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.bytes_read = 0
+
+    @property
+    def status(self):
+        return self._response.status
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    async def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        try:
+            async for chunk in self._response.content.iter_chunked(chunk_size):
+                self.bytes_read += len(chunk)
+                yield chunk
+        except asyncio.TimeoutError:
+            raise HTTPRequestTimeoutException({"message": "Inter service request timeout error"})
+        except ClientError as exception:
+            raise HTTPRequestException({"message": str(exception)})
+
+    async def iter_lines(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        pending = b""
+        async for chunk in self.iter_chunks(chunk_size):
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip(b"\r")
+        if pending:
+            yield pending.rstrip(b"\r")
+
+    async def iter_records(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Decode a newline delimited JSON (NDJSON) body one record at a time
+        """
+        async for line in self.iter_lines(chunk_size):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exception:
+                raise HTTPRequestException({"message": "Invalid NDJSON record: {}".format(exception)})
+
+    async def read(self):
+        return b"".join([chunk async for chunk in self.iter_chunks()])
+
+    def proxy_headers(self, forward_headers=PROXY_HEADERS):
+        headers = {name: self.headers[name] for name in forward_headers if name in self.headers}
+        if CONTENT_ENCODING in self.headers:
+            # aiohttp hands out the decompressed body, the upstream's encoding and length no longer apply
+            headers.pop(CONTENT_ENCODING, None)
+            headers.pop(CONTENT_LENGTH, None)
+        return headers
+
+    async def pipe(self, downstream, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Write the body to a Sanic streaming response one chunk at a time. ``send`` waits while
+        the client's socket is not draining, and the next chunk is only read from the upstream
+        after that, so at most about one chunk is held in memory in between.
+        """
+        async for chunk in self.iter_chunks(chunk_size):
+            await downstream.send(chunk)
@@ -1,12 +1,27 @@
+from ..json_codec import RawJson
+
+
 class AsyncTaskResponse:
     def __init__(self, data, meta=None, status_code=None, headers=None):
         self._data = data
         self._meta = meta
         self._status_code = status_code
         self._headers = headers
+        # set by TaskExecutor when optional tasks were dropped to answer in time
+        self.partial_complete = False
 
     @property
     def data(self):
+        if isinstance(self._data, RawJson):
+            self._data = self._data.decode()
+        return self._data
+
+    @property
+    def raw_data(self):
+        """
+        data without decoding it, a RawJson for lazily decoded upstream responses, meant to be
+        handed to send_response as is for pass-through endpoints
+        """
         return self._data
 
     @property
@@ -23,9 +38,9 @@ class AsyncTaskResponse:
 
     def __dict__(self):
         result = dict()
-        result["data"] = self._data
+        result["data"] = self.data
         result["meta"] = self._meta
         result["headers"] = self._headers
-        result["partial_complete"] = False
+        result["partial_complete"] = self.partial_complete
         result["is_success"] = True
         return result
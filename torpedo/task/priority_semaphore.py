@@ -0,0 +1,53 @@
+import asyncio
+import heapq
+import itertools
+
+
+class PrioritySemaphore:
+    """
+    Semaphore handing a freed slot to the waiter with the lowest priority value, first come
+    first served among equal priorities.
+    """
+
+    def __init__(self, value):
+        self.limit = value
+        self._value = value
+        self._waiters = []
+        self._counter = itertools.count()
+
+    @property
+    def in_use(self):
+        return self.limit - self._value
+
+    @property
+    def queue_depth(self):
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, priority=0):
+        # drop waiters that went away, they would hold up the fast path
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+
+        waiter = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), waiter))
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over right as the caller went away, pass it on
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._value += 1
+
+    def stats(self):
+        return {"limit": self.limit, "in_use": self.in_use, "queue_depth": self.queue_depth}
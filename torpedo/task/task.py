@@ -1,9 +1,35 @@
+# TaskExecutor hands free slots to lower values first
+MAIN_TASK_PRIORITY = 0
+OPTIONAL_TASK_PRIORITY = 1
+
+
 class Task:
-    def __init__(self, func, result_key, is_main=True):
+    def __init__(
+        self, func, result_key, is_main=True, depends_on=None, timeout=None, priority=None, cpu_bound=False,
+        blocking=False,
+    ):
+        """
+        :param func: coroutine to run, or for tasks with dependencies a callable receiving a dict
+            of the results of ``depends_on`` keyed by result_key and returning an awaitable
+        :param depends_on: result_keys of the tasks this task needs the results of
+        :param timeout: seconds the task may run, its result is a TaskTimeoutException after that
+        :param priority: lower runs first when the executor is out of slots, defaults to
+            MAIN_TASK_PRIORITY for main tasks and OPTIONAL_TASK_PRIORITY for the others
+        :param cpu_bound: func is a plain function run in the Offloader's process pool
+        :param blocking: func is a plain function run in the Offloader's thread pool
+        """
         self._func = func
         self._result_key = result_key
         self._result = None
         self._is_main = is_main
+        self._depends_on = tuple(depends_on or ())
+        self._timeout = timeout
+        self._priority = priority
+        self._cpu_bound = cpu_bound
+        self._blocking = blocking
+        self.queued_at = None
+        self.started_at = None
+        self.finished_at = None
 
     @property
     def result_key(self):
@@ -24,3 +50,44 @@ class Task:
     @property
     def is_main(self):
         return self._is_main
+
+    @property
+    def depends_on(self):
+        return self._depends_on
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def priority(self):
+        if self._priority is not None:
+            return self._priority
+        return MAIN_TASK_PRIORITY if self._is_main else OPTIONAL_TASK_PRIORITY
+
+    @property
+    def cpu_bound(self):
+        return self._cpu_bound
+
+    @property
+    def offloaded(self):
+        return self._cpu_bound or self._blocking
+
+    @property
+    def failed(self):
+        return isinstance(self._result, BaseException)
+
+    @property
+    def queue_time(self):
+        """
+        seconds between the task being ready to run and getting a slot
+        """
+        if self.queued_at is None or self.started_at is None:
+            return None
+        return self.started_at - self.queued_at
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
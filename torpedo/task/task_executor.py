@@ -1,37 +1,243 @@
 import asyncio
+import contextvars
+import time
 
-from ..exceptions import TaskExecutorException
+from ..common_utils import CONFIG
+from ..deadline import get_remaining_budget
+from ..offload import Offloader
+from ..exceptions import TaskDependencyFailedException, TaskExecutorException, TaskTimeoutException
+from .async_task_response import AsyncTaskResponse
+from .priority_semaphore import PrioritySemaphore
+
+_shared_semaphore = None
+# set in a task holding a slot of the shared semaphore, tasks of executors nested in it inherit it
+# and run in that slot, queueing them on the shared semaphore again could take every slot
+HOLDING_SHARED_SLOT = contextvars.ContextVar("holding_shared_slot", default=False)
+
+
+def get_shared_semaphore():
+    """
+    Worker wide cap on tasks running at once over all executors, TASK_EXECUTOR.MAX_CONCURRENCY
+    in config.json, None when not configured
+    """
+    global _shared_semaphore
+    limit = ((CONFIG.config or {}).get("TASK_EXECUTOR") or {}).get("MAX_CONCURRENCY")
+    if not limit:
+        return None
+    if _shared_semaphore is None or _shared_semaphore.limit != limit:
+        _shared_semaphore = PrioritySemaphore(limit)
+    return _shared_semaphore
 
 
 class TaskExecutor:
-    def __init__(self, tasks: list):
+    """
+    Runs the submitted tasks concurrently. A task declaring ``depends_on`` starts as soon as all
+    the tasks it depends on finished, tasks whose dependencies failed are skipped and get a
+    TaskDependencyFailedException as result.
+
+    ``timeout`` bounds the whole run, it defaults to the remaining budget of the request's
+    deadline. With a ``grace_period``, optional (non main) tasks get that many seconds once all
+    main tasks finished. Tasks still running when time is up are cancelled with a
+    TaskTimeoutException as result, ``partial_complete`` is then set on the executor and on the
+    AsyncTaskResponse results.
+
+    At most ``max_concurrency`` tasks of the executor, and TASK_EXECUTOR.MAX_CONCURRENCY tasks of
+    the whole worker, run at once; waiting tasks get free slots by priority, main tasks first.
+    Tasks of an executor submitted from within a running task share that task's worker wide slot.
+    Every task records the time it spent waiting in ``queue_time``.
+
+    After submit, ``critical_path`` holds the result_keys of the chain of tasks that determined
+    the total run time and ``critical_path_time`` the seconds that chain took.
+    """
+
+    def __init__(self, tasks: list, timeout=None, grace_period=None, max_concurrency=None):
         self._tasks = tasks
+        self._timeout = timeout
+        self._grace_period = grace_period
+        self._semaphore = PrioritySemaphore(max_concurrency) if max_concurrency else None
+        self._shared_semaphore = None
         self._task_mapping = {}
         self._executable_tasks = []
+        self._tasks_by_key = {}
+        self._futures = {}
+        self.critical_path = []
+        self.critical_path_time = None
+        self.partial_complete = False
 
     async def submit(self):
         self.build_task_mapping()
-        tasks = self._executable_tasks
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # every future exists before the first task runs and looks up its dependencies
+        for task in self._executable_tasks:
+            self._futures[task] = asyncio.ensure_future(self._execute(task))
+        try:
+            await self._wait()
+        finally:
+            pending = [future for future in self._futures.values() if not future.done()]
+            for future in pending:
+                future.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        self._mark_partial()
+        self._find_critical_path()
+        return self._tasks
 
-        for index, result in enumerate(results):
-            self._task_mapping[index].result = result
+    async def _wait(self):
+        timeout = self._timeout
+        if timeout is None:
+            timeout = get_remaining_budget()
+        deadline = time.monotonic() + timeout if timeout is not None else None
 
-        return self._tasks
+        main = [self._futures[task] for task in self._executable_tasks if task.is_main]
+        _, pending = await asyncio.wait(main, timeout=self._remaining(deadline))
+        if pending:
+            return
+
+        optional = [future for future in self._futures.values() if not future.done()]
+        if not optional:
+            return
+        remaining = self._remaining(deadline)
+        if self._grace_period is not None:
+            remaining = self._grace_period if remaining is None else min(remaining, self._grace_period)
+        await asyncio.wait(optional, timeout=remaining)
+
+    @staticmethod
+    def _remaining(deadline):
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    def _mark_partial(self):
+        self.partial_complete = any(isinstance(task.result, TaskTimeoutException) for task in self._tasks)
+        if not self.partial_complete:
+            return
+        for task in self._tasks:
+            if isinstance(task.result, AsyncTaskResponse):
+                task.result.partial_complete = True
 
     def build_task_mapping(self):
+        if not HOLDING_SHARED_SLOT.get():
+            self._shared_semaphore = get_shared_semaphore()
         index = 0
         is_main_task_present = False
-
         for task in self._tasks:
             if task.is_main:
                 is_main_task_present = True
-
-            self._executable_tasks.append(task.func)
+            self._executable_tasks.append(task)
             self._task_mapping[index] = task
+            self._tasks_by_key.setdefault(task.result_key, []).append(task)
             index += 1
 
         if not is_main_task_present:
             raise TaskExecutorException(
                 "Atleast one task should be main while submitting " "to executor"
             )
+        self._validate_dependencies()
+
+    def _validate_dependencies(self):
+        for task in self._tasks:
+            for key in task.depends_on:
+                if key not in self._tasks_by_key:
+                    raise TaskExecutorException("Task {} depends on unknown task {}".format(task.result_key, key))
+                if len(self._tasks_by_key[key]) > 1:
+                    raise TaskExecutorException("Task {} depends on ambiguous result key {}".format(task.result_key, key))
+
+        visited, in_progress = set(), set()
+
+        def visit(task):
+            if task in visited:
+                return
+            if task in in_progress:
+                raise TaskExecutorException("Dependency cycle through task {}".format(task.result_key))
+            in_progress.add(task)
+            for dependency in self._dependencies(task):
+                visit(dependency)
+            in_progress.discard(task)
+            visited.add(task)
+
+        for task in self._tasks:
+            visit(task)
+
+    def _dependencies(self, task):
+        return [self._tasks_by_key[key][0] for key in task.depends_on]
+
+    async def _execute(self, task):
+        dependencies = self._dependencies(task)
+        if dependencies:
+            try:
+                # unlike gather, wait leaves the dependencies running when this task is cancelled
+                await asyncio.wait([self._futures[dependency] for dependency in dependencies])
+            except asyncio.CancelledError:
+                self._discard(task)
+                task.result = TaskTimeoutException("Task {} cancelled before it started".format(task.result_key))
+                return
+            failed = [str(dependency.result_key) for dependency in dependencies if dependency.failed]
+            if failed:
+                self._discard(task)
+                task.result = TaskDependencyFailedException(
+                    "Task {} skipped, it depends on failed tasks {}".format(task.result_key, ", ".join(failed))
+                )
+                return
+
+        task.queued_at = time.monotonic()
+        acquired = []
+        try:
+            for semaphore in (self._semaphore, self._shared_semaphore):
+                if semaphore is not None:
+                    await semaphore.acquire(task.priority)
+                    acquired.append(semaphore)
+        except asyncio.CancelledError:
+            self._release(acquired)
+            self._discard(task)
+            task.result = TaskTimeoutException("Task {} cancelled while queued".format(task.result_key))
+            return
+        if self._shared_semaphore is not None:
+            # only this task's context, executors it submits see it
+            HOLDING_SHARED_SLOT.set(True)
+
+        task.started_at = time.monotonic()
+        try:
+            func = task.func
+            results = {dependency.result_key: dependency.result for dependency in dependencies}
+            if task.offloaded:
+                args = (results,) if dependencies else ()
+                func = Offloader.run(func, *args, cpu_bound=task.cpu_bound)
+            elif dependencies and callable(func):
+                func = func(results)
+            task.result = await asyncio.wait_for(func, task.timeout)
+        except asyncio.TimeoutError:
+            task.result = TaskTimeoutException("Task {} timed out".format(task.result_key))
+        except asyncio.CancelledError:
+            # cancelled by submit once the executor ran out of time
+            task.result = TaskTimeoutException("Task {} cancelled, out of time".format(task.result_key))
+        except Exception as exception:
+            task.result = exception
+        finally:
+            task.finished_at = time.monotonic()
+            self._release(acquired)
+
+    @staticmethod
+    def _release(semaphores):
+        for semaphore in reversed(semaphores):
+            semaphore.release()
+
+    @staticmethod
+    def _discard(task):
+        # close coroutines that will never run, asyncio would warn about them otherwise
+        if asyncio.iscoroutine(task.func):
+            task.func.close()
+
+    def _find_critical_path(self):
+        finished = [task for task in self._tasks if task.finished_at is not None]
+        if not finished:
+            return
+        task = max(finished, key=lambda item: item.finished_at)
+        path = [task]
+        while True:
+            dependencies = [dependency for dependency in self._dependencies(task) if dependency.finished_at is not None]
+            if not dependencies:
+                break
+            task = max(dependencies, key=lambda item: item.finished_at)
+            path.append(task)
+        path.reverse()
+        self.critical_path = [task.result_key for task in path]
+        self.critical_path_time = path[-1].finished_at - path[0].started_at
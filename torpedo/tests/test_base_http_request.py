@@ -0,0 +1,154 @@
+import asyncio
+import logging
+
+from sanic import Sanic
+from sanic.response import raw
+
+from torpedo.base_http_request import BaseHttpRequest
+from torpedo.constants import ETAG, IF_NONE_MATCH
+from torpedo.hedging import HedgePolicy
+from torpedo.response_cache import ResponseCache
+
+
+class CachedClient(BaseHttpRequest):
+    _host = "http://upstream"
+    _config = {"NAME": "test"}
+    _cache = ResponseCache(ttl=0)
+    _coalesce_requests = True
+    calls = []
+
+    @classmethod
+    async def _fetch_with_retries(cls, method, url, data, headers, timeout, request_params, retry_policy=None,
+                                  hedge_policy=None):
+        cls.calls.append(headers.get(IF_NONE_MATCH))
+        await asyncio.sleep(0.01)
+        if headers.get(IF_NONE_MATCH) == '"v1"':
+            return 304, {ETAG: '"v1"'}, b""
+        return 200, {ETAG: '"v1"'}, b'{"items": [1]}'
+
+
+def test_uncached_caller_does_not_share_revalidation(loop):
+    CachedClient.calls = []
+    # stale entry that can be revalidated
+    CachedClient._cache.store(
+        CachedClient._cache.build_key("get", "http://upstream/items"), 200, {ETAG: '"v1"'}, b'{"items": [1]}'
+    )
+
+    async def concurrent_calls():
+        return await asyncio.gather(
+            CachedClient.request("get", "/items", headers={}),
+            CachedClient.request("get", "/items", headers={}, use_cache=False),
+        )
+
+    revalidated, uncached = loop.run_until_complete(concurrent_calls())
+    assert revalidated.data == {"items": [1]}
+    assert uncached.status == 200
+    assert uncached.data == {"items": [1]}
+    assert sorted(CachedClient.calls, key=str) == ['"v1"', None]
+
+
+class UserClient(BaseHttpRequest):
+    _host = "http://upstream"
+    _config = {"NAME": "test"}
+    _cache = ResponseCache(ttl=60)
+
+    @classmethod
+    async def _fetch_with_retries(cls, method, url, data, headers, timeout, request_params, retry_policy=None,
+                                  hedge_policy=None):
+        return 200, {}, b'{"user": "%s"}' % (headers.get("Authorization") or "anonymous").encode()
+
+
+def test_requests_for_a_user_bypass_shared_cache(loop):
+    def get_user(headers):
+        return loop.run_until_complete(UserClient.request("get", "/me", headers=headers)).data["user"]
+
+    assert get_user({"Authorization": "alice"}) == "alice"
+    assert get_user({"Authorization": "bob"}) == "bob"
+    assert get_user({"cookie": "session=1"}) == "anonymous"
+    assert UserClient.cache_stats()["entries"] == 0
+
+    assert get_user({}) == "anonymous"
+    assert get_user({"Authorization": "alice"}) == "alice"
+    assert UserClient.cache_stats()["entries"] == 1
+
+
+class BalancedClient(BaseHttpRequest):
+    _hosts = ["http://upstream-1:8000", "http://upstream-2:8000/"]
+    _config = {"NAME": "test"}
+    _bulk_limit_per_host = 2
+
+    @classmethod
+    async def _fetch_with_retries(cls, method, url, data, headers, timeout, request_params, retry_policy=None,
+                                  hedge_policy=None):
+        return 200, {}, b'{"path": "%s"}' % url.path.encode()
+
+
+class HedgedBalancedClient(BaseHttpRequest):
+    _host = "/api"
+    _hosts = ["http://upstream-1:8000", "http://upstream-2:8000"]
+    _config = {"NAME": "test"}
+    _hedge_policy = HedgePolicy(delay=1)
+
+    @classmethod
+    async def _fetch_from(cls, method, url, data, headers, timeout, request_params):
+        return 200, {}, b'{"url": "%s"}' % str(url).encode()
+
+
+class SocketClient(BaseHttpRequest):
+    _host = "unix:///run/upstream.sock"
+
+
+def test_upstream_key():
+    assert BalancedClient.get_upstream_key() == "http://upstream-1:8000,http://upstream-2:8000"
+    assert SocketClient.get_upstream_key() == "unix:///run/upstream.sock"
+    assert CachedClient.get_upstream_key() == "http://upstream"
+
+
+def test_map_over_balanced_hosts_with_bulk_limit(loop):
+    async def collect():
+        results = {}
+        async for item, response in BalancedClient.map("get", "/skus/{}", [1, 2, 3], headers={}):
+            results[item] = response.data
+        return results
+
+    results = loop.run_until_complete(collect())
+    assert results == {1: {"path": "/skus/1"}, 2: {"path": "/skus/2"}, 3: {"path": "/skus/3"}}
+
+
+def test_hedged_get_over_balanced_hosts_with_base_path(loop):
+    response = loop.run_until_complete(HedgedBalancedClient.request("get", "/items", headers={}))
+    assert response.data["url"] in ("http://upstream-1:8000/api/items", "http://upstream-2:8000/api/items")
+    assert HedgedBalancedClient._hedge_policy.stats()["delays"] == {
+        "http://upstream-1:8000,http://upstream-2:8000": 1
+    }
+
+
+async def test_proxy_through_sanic_route(loop, sanic_client, caplog):
+    upstream = Sanic("proxy_upstream")
+    report = b"sku,count\n" * 10000
+
+    @upstream.route("/reports/1")
+    async def get_report(request):
+        return raw(report, headers={"Content-Disposition": "attachment; filename=report.csv"})
+
+    upstream_client = await sanic_client(upstream)
+
+    class ReportClient(BaseHttpRequest):
+        _host = "http://{}:{}".format(upstream_client.host, upstream_client.port)
+        _config = {"NAME": "test"}
+
+    app = Sanic("proxy_app")
+
+    @app.route("/download")
+    async def download(request):
+        # a handler returning what proxy returns must not make Sanic try to respond twice
+        return await ReportClient.proxy(request, "get", "/reports/1", headers={})
+
+    client = await sanic_client(app)
+    with caplog.at_level(logging.ERROR):
+        response = await client.get("/download")
+
+    assert response.status_code == 200
+    assert response.content == report
+    assert response.headers["Content-Disposition"] == "attachment; filename=report.csv"
+    assert "will not be sent" not in caplog.text
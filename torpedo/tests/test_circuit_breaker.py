@@ -0,0 +1,44 @@
+from torpedo.circuit_breaker import CircuitBreaker
+from torpedo.constants import CircuitBreakerState
+
+
+def open_circuit(half_open_max_calls=1):
+    breaker = CircuitBreaker(min_requests=1, open_duration=0, half_open_max_calls=half_open_max_calls)
+    circuit = breaker.for_host("http://upstream")
+    late_call = circuit.before_request()
+    circuit.record_failure(circuit.before_request())
+    assert circuit.state == CircuitBreakerState.OPEN
+    return circuit, late_call
+
+
+def test_probe_success_closes_circuit():
+    circuit, _ = open_circuit()
+    probe = circuit.before_request()
+    assert circuit.state == CircuitBreakerState.HALF_OPEN
+    circuit.record_result(200, probe)
+    assert circuit.state == CircuitBreakerState.CLOSED
+
+
+def test_calls_started_before_trip_do_not_decide_half_open_circuit():
+    circuit, late_call = open_circuit()
+    probe = circuit.before_request()
+    circuit.record_result(200, late_call)
+    assert circuit.state == CircuitBreakerState.HALF_OPEN
+    circuit.record_failure(late_call)
+    assert circuit.state == CircuitBreakerState.HALF_OPEN
+    circuit.record_failure(probe)
+    assert circuit.state == CircuitBreakerState.OPEN
+
+
+def test_probes_of_previous_half_open_period_are_ignored():
+    circuit, _ = open_circuit(half_open_max_calls=2)
+    slow_probe, failed_probe = circuit.before_request(), circuit.before_request()
+    circuit.record_failure(failed_probe)
+    assert circuit.state == CircuitBreakerState.OPEN
+
+    first_probe, second_probe = circuit.before_request(), circuit.before_request()
+    circuit.record_result(200, slow_probe)
+    circuit.record_result(200, first_probe)
+    assert circuit.state == CircuitBreakerState.HALF_OPEN
+    circuit.record_result(200, second_probe)
+    assert circuit.state == CircuitBreakerState.CLOSED
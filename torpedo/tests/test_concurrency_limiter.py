@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from torpedo import concurrency_limiter
+from torpedo.concurrency_limiter import AdaptiveConcurrencyLimiter
+from torpedo.exceptions import ConcurrencyLimitExceededException
+
+
+def test_slot_handed_over_as_wait_times_out_is_released(loop, monkeypatch):
+    host_limiter = AdaptiveConcurrencyLimiter(initial_limit=1, queue_timeout=1).for_host("http://upstream")
+
+    async def wait_for_losing_race(waiter, timeout):
+        # the caller holding the slot finishes right as the wait times out
+        host_limiter.release()
+        assert waiter.done()
+        raise asyncio.TimeoutError()
+
+    async def acquire_twice():
+        await host_limiter.acquire()
+        monkeypatch.setattr(concurrency_limiter.asyncio, "wait_for", wait_for_losing_race)
+        await host_limiter.acquire()
+
+    with pytest.raises(ConcurrencyLimitExceededException):
+        loop.run_until_complete(acquire_twice())
+    assert host_limiter.in_flight == 0
+    assert host_limiter.rejected == 1
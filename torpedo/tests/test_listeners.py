@@ -0,0 +1,47 @@
+import asyncio
+import os
+import tempfile
+
+from aiohttp import ClientSession, UnixConnector
+from sanic import Sanic
+from sanic.response import json
+from sanic.server.socket import bind_unix_socket, remove_unix_socket
+
+from torpedo.common_utils import CONFIG
+from torpedo.listeners import start_logging, start_unix_socket_server, stop_logging, stop_unix_socket_server
+from torpedo.log import get_log_pipeline_stats, get_log_sampling_stats
+
+
+async def test_stop_unix_socket_server_closes_keep_alive_connections(loop, sanic_client):
+    app = Sanic("unix_socket_app")
+
+    @app.route("/ping")
+    async def ping(request):
+        return json({"ping": "pong"})
+
+    await sanic_client(app)
+    path = os.path.join(tempfile.mkdtemp(), "app.sock")
+    app.ctx.unix_socket = bind_unix_socket(path)
+    try:
+        await start_unix_socket_server(app, loop)
+        async with ClientSession(connector=UnixConnector(path=path)) as session:
+            async with session.get("http://localhost/ping") as response:
+                assert await response.json() == {"ping": "pong"}
+            # the keep-alive connection stays open in the session's pool
+            assert len(app.ctx.unix_connections) == 1
+
+            await asyncio.wait_for(stop_unix_socket_server(app, loop), 5)
+            assert not app.ctx.unix_connections
+    finally:
+        remove_unix_socket(path)
+
+
+def test_logging_options_ignored_in_debug(loop, monkeypatch):
+    config = {"DEBUG": True, "LOGGING": {"ASYNC": True, "SAMPLING": {"DEDUPE_WINDOW": 10}}}
+    monkeypatch.setattr(CONFIG, "config", config)
+    loop.run_until_complete(start_logging(None, loop))
+    try:
+        assert get_log_pipeline_stats() is None
+        assert get_log_sampling_stats() is None
+    finally:
+        loop.run_until_complete(stop_logging(None, loop))
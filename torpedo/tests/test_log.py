@@ -0,0 +1,84 @@
+import datetime
+import io
+import json
+import logging
+
+import pytest
+
+from torpedo.log import CustomTimeLoggingFormatter, FastLoggingFormatter, LogPipeline, LogSampler, QueuedHandler
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+@pytest.mark.parametrize("formatter_class", [CustomTimeLoggingFormatter, FastLoggingFormatter])
+def test_extra_values_json_can_not_encode(formatter_class):
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, {"day": datetime.date(2024, 1, 2)}, None, None)
+    record.error = ValueError("boom")
+    record.tags = {"a"}
+    record.at = datetime.datetime(2024, 1, 2, 3, 4, 5)
+
+    log_record = json.loads(formatter_class(LOG_FORMAT).format(record))
+    assert log_record["error"] == "boom"
+    assert log_record["tags"] == "{'a'}"
+    assert log_record["at"] == "2024-01-02T03:04:05"
+    assert json.loads(log_record["message"]) == {"day": "2024-01-02"}
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super(RecordingHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_collapsed_burst_is_logged_once_window_closes():
+    handler = RecordingHandler()
+    sampler = LogSampler(dedupe_window=10)
+    handler.addFilter(sampler)
+    app_logger = logging.getLogger("torpedo.tests.sampling")
+    app_logger.addHandler(handler)
+    try:
+        for _ in range(5):
+            app_logger.error("upstream down")
+        assert [getattr(record, "suppressed", None) for record in handler.records] == [None]
+
+        sampler.flush(handler.records[0].created + 10)
+        assert [getattr(record, "suppressed", None) for record in handler.records] == [None, 4]
+        assert handler.records[1].getMessage() == "upstream down"
+
+        # the count is logged once
+        sampler.flush(handler.records[0].created + 20)
+        assert len(handler.records) == 2
+    finally:
+        app_logger.removeHandler(handler)
+        sampler.stop()
+
+
+@pytest.mark.parametrize("formatter_class", [CustomTimeLoggingFormatter, FastLoggingFormatter])
+def test_pipeline_logs_values_at_call_time(formatter_class):
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(formatter_class(LOG_FORMAT))
+    pipeline = LogPipeline()
+    app_logger = logging.getLogger("torpedo.tests.pipeline")
+    app_logger.propagate = False
+    app_logger.handlers = [QueuedHandler(pipeline, [handler])]
+    try:
+        values = {"a": 1}
+        app_logger.warning("values %s", values)
+        app_logger.warning(values)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            app_logger.exception("failed")
+        values["a"] = 2
+    finally:
+        pipeline.stop()
+        app_logger.handlers = []
+
+    log_records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [log_record["message"] for log_record in log_records] == ["values {'a': 1}", '{"a":1}', "failed"]
+    assert log_records[2]["exception_type"] == "ValueError"
+    assert "ValueError: boom" in log_records[2]["traceback"]
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from torpedo import json_codec
+from torpedo.exceptions import HTTPInterServiceRequestException
+from torpedo.parser import BaseApiResponseParser, split_api_envelope
+
+
+def lazy_parse(payload):
+    data = BaseApiResponseParser.lazy_load(json.dumps(payload).encode())
+    return BaseApiResponseParser(data, 200, None, None).parse()
+
+
+def test_split_torpedo_envelope():
+    payload = {"data": {"items": [1, 2], "note": "a, \"is_success\": ]}"}, "is_success": True, "status_code": 200}
+    data, envelope = split_api_envelope(json.dumps(payload).encode())
+    assert json_codec.loads(data) == payload["data"]
+    assert envelope == {"is_success": True, "status_code": 200}
+
+
+def test_split_skips_nested_is_success_in_meta():
+    payload = {"data": [1, 2], "is_success": True, "status_code": 200, "meta": {"inner": {"is_success": False}}}
+    data, envelope = split_api_envelope(json.dumps(payload).encode())
+    assert json_codec.loads(data) == [1, 2]
+    assert envelope["meta"] == payload["meta"]
+
+
+def test_reordered_keys_fall_back_to_full_decode():
+    payload = {"data": {"a": 1}, "status_code": 200, "is_success": True}
+    assert split_api_envelope(json.dumps(payload).encode()) is None
+    response = lazy_parse(payload)
+    assert response.data == {"a": 1}
+    assert response.status == 200
+
+
+def test_meta_before_is_success_falls_back_to_full_decode():
+    payload = {"data": [1, 2], "meta": {"page": 1}, "is_success": True, "status_code": 200}
+    assert split_api_envelope(json.dumps(payload).encode()) is None
+    response = lazy_parse(payload)
+    assert response.data == [1, 2]
+    assert response.meta == {"page": 1}
+
+
+def test_failed_response_raises_mapped_exception():
+    payload = {"data": None, "is_success": False, "status_code": 400, "error": {"message": "bad"}}
+    with pytest.raises(HTTPInterServiceRequestException):
+        lazy_parse(payload)
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from torpedo.common_utils import CONFIG
+from torpedo.exceptions import TaskDependencyFailedException, TaskExecutorException, TaskTimeoutException
+from torpedo.task import AsyncTaskResponse, Task, TaskExecutor
+from torpedo.task import task_executor
+
+
+@pytest.fixture
+def max_concurrency(monkeypatch):
+    def configure(limit):
+        monkeypatch.setattr(CONFIG, "config", {"TASK_EXECUTOR": {"MAX_CONCURRENCY": limit}})
+        monkeypatch.setattr(task_executor, "_shared_semaphore", None)
+
+    configure(None)
+    return configure
+
+
+async def value(result, delay=0.0):
+    await asyncio.sleep(delay)
+    return result
+
+
+async def fail():
+    raise ValueError("upstream failed")
+
+
+def test_results_by_result_key(loop, max_concurrency):
+    tasks = [Task(value(1), "one"), Task(value(2), "two", is_main=False)]
+    loop.run_until_complete(TaskExecutor(tasks).submit())
+    assert [task.result for task in tasks] == [1, 2]
+
+
+def test_main_task_required(loop, max_concurrency):
+    coroutine = value(1)
+    with pytest.raises(TaskExecutorException):
+        loop.run_until_complete(TaskExecutor([Task(coroutine, "one", is_main=False)]).submit())
+    coroutine.close()
+
+
+def test_dependencies_receive_results(loop, max_concurrency):
+    tasks = [
+        Task(value(2, 0.01), "base"),
+        Task(lambda results: value(results["base"] * 10), "derived", depends_on=["base"]),
+    ]
+    executor = TaskExecutor(tasks)
+    loop.run_until_complete(executor.submit())
+    assert tasks[1].result == 20
+    assert executor.critical_path == ["base", "derived"]
+
+
+def test_dependents_of_failed_task_are_skipped(loop, max_concurrency):
+    tasks = [Task(fail(), "base"), Task(lambda results: value(1), "derived", depends_on=["base"])]
+    loop.run_until_complete(TaskExecutor(tasks).submit())
+    assert isinstance(tasks[0].result, ValueError)
+    assert isinstance(tasks[1].result, TaskDependencyFailedException)
+
+
+def test_dependency_cycle_rejected(loop, max_concurrency):
+    tasks = [
+        Task(lambda results: value(1), "a", depends_on=["b"]),
+        Task(lambda results: value(2), "b", depends_on=["a"]),
+    ]
+    with pytest.raises(TaskExecutorException):
+        loop.run_until_complete(TaskExecutor(tasks).submit())
+
+
+def test_timeout_marks_partial_complete(loop, max_concurrency):
+    tasks = [Task(value(AsyncTaskResponse({"a": 1})), "fast"), Task(value(2, 1), "slow", is_main=False)]
+    executor = TaskExecutor(tasks, grace_period=0.01)
+    loop.run_until_complete(executor.submit())
+    assert isinstance(tasks[1].result, TaskTimeoutException)
+    assert executor.partial_complete
+    assert tasks[0].result.partial_complete
+
+
+def test_max_concurrency(loop, max_concurrency):
+    running, peak = [0], [0]
+
+    async def track():
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+
+    loop.run_until_complete(TaskExecutor([Task(track(), index) for index in range(6)], max_concurrency=2).submit())
+    assert peak[0] == 2
+
+
+def test_nested_executors_share_worker_slot(loop, max_concurrency):
+    max_concurrency(2)
+
+    async def parent(key):
+        children = [Task(value(key), key)]
+        await TaskExecutor(children).submit()
+        return children[0].result
+
+    tasks = [Task(parent("a"), "a"), Task(parent("b"), "b")]
+    loop.run_until_complete(asyncio.wait_for(TaskExecutor(tasks).submit(), 1))
+    assert [task.result for task in tasks] == ["a", "b"]
+    assert task_executor.get_shared_semaphore().in_use == 0